@@ -1,34 +1,37 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
 import random
 import time
-import re
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from steam_api import get_app_details, extract_preview_urls, calc_attention_label, calc_expectation_label, get_follower_count
-from utils import get_base64_image, get_icon_html
-from components import render_game_card, render_magic_logo
+from search import TAG_CATEGORIES, SearchError, fetch_search_page, run_search_page
+from enrichment import apply_cached_review_summaries, enrich_all, mark_lazy
+from treasure import random_offsets, scan_offsets
+from result_cache import make_query_key, get_cached_page, store_results
+from catalog import get_catalog, get_latest_catalog
+from http_client import retry_after
+from scheduler import HOST_SCHEDULERS, STORE_HOST, SCAN, JobDropped, current_session_id, request_context
+from paging import PAGE_SIZE, make_page_query, use_lazy_enrichment, load_page, prefetch_page
+from session_store import SESSION_RESULTS
+from utils import get_icon_html
+from assets import REGISTRY
+from components import (
+    create_card_slots, render_details_picker, render_game_card, render_game_grid, render_magic_logo,
+)
+import config
+import metrics
 
-from PIL import Image
-import base64
 import os
+import uuid
 
-# ページ設定
-try:
-    icon = Image.open("icon.png")
-except:
-    icon = "⚔️"
+# ページ設定（アイコンは縮小済みのものを使用）
+icon = REGISTRY.page_icon() or "⚔️"
 
 st.set_page_config(page_title="Steam Arcana", page_icon=icon, layout="wide")
 
-# アニメーション用画像の読み込み
-bg_b64 = ""
-adv_b64 = ""
-if os.path.exists("img/dungeon_wall.png"):
-    bg_b64 = get_base64_image("img/dungeon_wall.png")
-if os.path.exists("img/catgirl_run.gif"):
-    adv_b64 = get_base64_image("img/catgirl_run.gif")
+# メトリクスエンドポイント（STEAM_ARCANA_METRICS_PORT 指定時のみ。プロセスごとに1回だけ起動）
+metrics.start_server()
+
+# アニメーション用画像（静的ファイル配信が有効ならURL参照、無効ならbase64埋め込み）
+bg_url = REGISTRY.static_url("img/dungeon_wall.png")
+adv_url = REGISTRY.static_url("img/catgirl_run.gif")
 
 # ----------------------------------------------------
 # 🧛 カスタムCSS
@@ -205,7 +208,7 @@ st.markdown(f"""
 .adventure-container {{
     width: 100%;
     height: 100px;
-    background-image: url("data:image/png;base64,{bg_b64}");
+    background-image: url("{bg_url}");
     background-repeat: repeat-x;
     background-size: 100px 100px;
     animation: slide-bg 1s linear infinite;
@@ -219,7 +222,7 @@ st.markdown(f"""
 .adventurer {{
     width: 64px;
     height: 64px;
-    background-image: url("data:image/gif;base64,{adv_b64}");
+    background-image: url("{adv_url}");
     background-size: contain;
     background-repeat: no-repeat;
     background-position: center;
@@ -364,6 +367,57 @@ st.markdown(f"""
         50% {{ box-shadow: 0 0 15px rgba(76, 175, 80, 0.8); }}
     }}
     
+    /* 結果グリッド（全カードを1つの要素で描画） */
+    .card-grid {{
+        display: grid;
+        grid-template-columns: repeat(4, minmax(0, 1fr));
+        gap: 1rem;
+        margin-bottom: 1rem;
+    }}
+    @media (max-width: 1024px) {{
+        .card-grid {{ grid-template-columns: repeat(2, minmax(0, 1fr)); }}
+    }}
+    @media (max-width: 640px) {{
+        .card-grid {{ grid-template-columns: minmax(0, 1fr); }}
+    }}
+    /* グリッド内のカードはカラムと同じガラス風の背景 */
+    .card-grid .game-card {{
+        display: flex;
+        flex-direction: column;
+        min-height: 0;
+        background-color: rgba(20, 20, 20, 0.85);
+        padding: 10px;
+        border-radius: 8px;
+        border: 1px solid rgba(255, 255, 255, 0.1);
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.3);
+    }}
+
+    /* カード下部のレビュー数・フォロワー数 */
+    .card-caption {{
+        font-size: 0.875em;
+        color: rgba(250, 250, 250, 0.6);
+        margin-bottom: 8px;
+    }}
+
+    /* Steamへのリンク（日本語対応は強調表示） */
+    a.steam-link {{
+        display: block;
+        margin-top: auto;
+        padding: 6px 12px;
+        text-align: center;
+        border-radius: 8px;
+        border: 1px solid rgba(250, 250, 250, 0.2);
+        color: #fafafa !important;
+        text-decoration: none !important;
+    }}
+    a.steam-link.primary {{
+        background-color: #ff4b4b;
+        border-color: #ff4b4b;
+    }}
+    a.steam-link:hover {{
+        filter: brightness(1.15);
+    }}
+
     /* プレビュー画像スタイル */
     .preview-image {{
         border-radius: 6px;
@@ -506,6 +560,9 @@ st.markdown(f"""
             font-size: 20px;
         }}
     }}
+    
+    /* バッジアイコン（スプライト） */
+    {REGISTRY.badge_sprite_css()}
 </style>
 """, unsafe_allow_html=True)
 
@@ -658,25 +715,10 @@ st.components.v1.html(scroll_to_top_html, height=0)
 # ----------------------------------------------------
 
 # タイトル（中央揃え・魔法エフェクト付き）
-if os.path.exists("img/logo_steam_arcana_original.png"):
-    logo_b64 = get_base64_image("img/logo_steam_arcana_original.png")
-    render_magic_logo(logo_b64)
-else:
-    render_magic_logo(None) # デフォルトロゴ
+logo_url = REGISTRY.static_url("img/logo_steam_arcana_original.png")
+render_magic_logo(logo_url or None)  # 画像がなければデフォルトロゴ
 st.divider()
 
-# ジャンル定義 (JSONから読み込み)
-def load_tags():
-    with open("tags.json", "r", encoding="utf-8") as f:
-        categories = json.load(f)
-    # カテゴリを統合してフラットな辞書に変換
-    tags = {}
-    for category_tags in categories.values():
-        tags.update(category_tags)
-    return tags, categories  # カテゴリ情報も返す
-
-TAGS, TAG_CATEGORIES = load_tags()
-
 # カテゴリアイコン
 CATEGORY_ICONS = {
     "基本": "📦",
@@ -806,350 +848,49 @@ with settings_area:
 st.divider()
 
 # ----------------------------------------------------
-# ⚙️ 検索ロジック
+# 🎬 メイン処理
 # ----------------------------------------------------
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
-    "Cookie": "wants_mature_content=1; birthtime=946652401; lastagecheckage=1-January-2000"
-}
-
-
-def is_genre_match(game_tag_ids: list, target_tag_ids: list, exclude_tag_ids: list, check_primary: bool = False) -> bool:
-    """
-    ジャンル一致判定（改善版）
-    check_primary: Trueなら主要タグ（上位3つ）のみをチェック。Falseなら全タグをチェック。
-    デフォルトをFalseに変更して、検索漏れを防ぐ。
-    """
-    # 除外タグが含まれていたらFalse
-    for etid in exclude_tag_ids:
-        if etid in game_tag_ids:
-            return False
-    
-    # ターゲットタグが空なら全て許可
-    if not target_tag_ids:
-        return True
-    
-    # 主要タグ（先頭3つ）をチェックするか、全タグをチェックするか
-    tags_to_check = game_tag_ids[:3] if check_primary and len(game_tag_ids) >= 3 else game_tag_ids
-    
-    for tid in target_tag_ids:
-        if tid in tags_to_check:
-            return True
-    return False
-
-
-def extract_app_id(url: str) -> int:
-    """SteamストアURLからAppIDを抽出"""
-    match = re.search(r'/app/(\d+)', url)
-    return int(match.group(1)) if match else None
+def results_key() -> str:
+    """このセッションの検索結果を SESSION_RESULTS に保存するキー（結果そのものは session_state に置かない）"""
+    if "results_key" not in st.session_state:
+        st.session_state.results_key = current_session_id() or uuid.uuid4().hex
+    return st.session_state.results_key
 
 
-def search_steam_survivor(tags, exclude_tags_list, min_reviews=0, max_reviews=9999999, start_offset=0, only_japanese=True):
-    """Steamストアを検索してゲームリストを取得"""
-    base_url = "https://store.steampowered.com/search/results/"
-    
-    # タグIDを取得（配列の場合は展開）
-    target_tag_ids = []
-    for t in tags:
-        if t in TAGS:
-            tag_value = TAGS[t]
-            if isinstance(tag_value, list):
-                target_tag_ids.extend(tag_value)
-            else:
-                target_tag_ids.append(tag_value)
-    
-    exclude_tag_ids = []
-    for t in exclude_tags_list:
-        if t in TAGS:
-            tag_value = TAGS[t]
-            if isinstance(tag_value, list):
-                exclude_tag_ids.extend(tag_value)
-            else:
-                exclude_tag_ids.append(tag_value)
-    
-    search_tag_ids = [str(tid) for tid in target_tag_ids]
-    if "492" not in search_tag_ids:
-        search_tag_ids.append("492")
-    
-    params = {
-        "tags": ",".join(search_tag_ids),
-        "cc": "JP", "l": "japanese",
-        "category1": 998,
-        "sort_by": "Released_DESC",
-        "infinite": 1,
-        "start": start_offset,
-        "count": 50,
-    }
-    
-    if only_japanese:
-        params["supportedlang"] = "japanese"
-    
-    try:
-        res = requests.get(base_url, params=params, headers=HEADERS)
-        try:
-            data = res.json()
-        except:
-            # APIからの応答が不正な場合は空リストを返す
-            return []
-        soup = BeautifulSoup(data.get("results_html", ""), "html.parser")
-        rows = soup.select("a.search_result_row")
-        
-        games = []
-        for row in rows:
-            try:
-                tag_str = row.get("data-ds-tagids", "[]")
-                try:
-                    game_tag_ids = json.loads(tag_str)
-                except:
-                    continue
-                
-                if not is_genre_match(game_tag_ids, target_tag_ids, exclude_tag_ids):
-                    continue
-                
-                title = row.select_one(".title").text.strip()
-                link = row.get("href")
-                app_id = extract_app_id(link)
-                
-                review_count = 0
-                review_desc = "レビューなし"
-                review_tag = row.select_one(".search_review_summary")
-                if review_tag:
-                    tooltip = review_tag.get("data-tooltip-html", "")
-                    # 日本語パターン
-                    match = re.search(r"([\d,]+)件のユーザーレビュー", tooltip)
-                    if not match:
-                        # 英語パターン
-                        match = re.search(r"([\d,]+)\s*user reviews", tooltip, re.IGNORECASE)
-                    if not match:
-                        # フォールバック: 数字の後に%が来るパターン（例: "813件84%"）
-                        match = re.search(r"([\d,]+)[^\d]*[\d]+%", tooltip)
-                    if not match:
-                        # 最終フォールバック: 最初の大きな数字を取得
-                        numbers = re.findall(r"(\d+)", tooltip)
-                        if numbers:
-                            # 最初の数字（レビュー数）を取得
-                            review_count = int(numbers[0])
-                    if match:
-                        review_count = int(match.group(1).replace(",", ""))
-                    
-                    # レビュー概要を取得
-                    desc_parts = tooltip.split("<br>")
-                    if desc_parts:
-                        review_desc = desc_parts[0] if len(desc_parts[0]) < 50 else "好評"
-                
-                if review_count < min_reviews or review_count > max_reviews:
-                    continue
-                
-                img_tag = row.select_one("img")
-                img_src = img_tag.get("src") or img_tag.get("data-src") if img_tag else None
-                if img_src:
-                    img_src = img_src.split("?")[0].replace("capsule_sm_120", "header")
-                
-                price = "不明"
-                if row.select_one(".discount_final_price"):
-                    price = row.select_one(".discount_final_price").text.strip()
-                elif row.select_one(".search_price"):
-                    price_text = row.select_one(".search_price").text.strip()
-                    price = "無料プレイ" if "Free" in price_text or "無料" in price_text else price_text
-                
-                date = ""
-                date_tag = row.select_one(".search_released")
-                if date_tag:
-                    date = date_tag.text.strip()
-                
-                games.append({
-                    "app_id": app_id,
-                    "title": title,
-                    "link": link,
-                    "image": img_src,
-                    "price": price,
-                    "review_count": review_count,
-                    "review_desc": review_desc,
-                    "attention_label": calc_attention_label(review_count, review_desc),
-                    "date": date,
-                })
-            except:
-                continue
-        
-        return games
-    except Exception as e:
-        st.error(f"検索エラー: {e}")
-        return []
-
-
-def search_coming_soon(tags, exclude_tags_list, start_offset=0, only_japanese=True):
-    """Coming Soon（近日公開）のゲームを検索"""
-    base_url = "https://store.steampowered.com/search/results/"
-    
-    # タグIDを取得（配列の場合は展開）
-    target_tag_ids = []
-    for t in tags:
-        if t in TAGS:
-            tag_value = TAGS[t]
-            if isinstance(tag_value, list):
-                target_tag_ids.extend(tag_value)
-            else:
-                target_tag_ids.append(tag_value)
-    
-    exclude_tag_ids = []
-    for t in exclude_tags_list:
-        if t in TAGS:
-            tag_value = TAGS[t]
-            if isinstance(tag_value, list):
-                exclude_tag_ids.extend(tag_value)
-            else:
-                exclude_tag_ids.append(tag_value)
-    
-    search_tag_ids = [str(tid) for tid in target_tag_ids]
-    if "492" not in search_tag_ids:
-        search_tag_ids.append("492")  # インディー
-    
-    params = {
-        "filter": "comingsoon",  # Coming Soonフィルタ
-        "tags": ",".join(search_tag_ids),
-        "cc": "JP", "l": "japanese",
-        "category1": 998,
-        "sort_by": "Released_ASC",  # リリース予定日昇順
-        "infinite": 1,
-        "start": start_offset,
-        "count": 50,
-    }
-    
-    if only_japanese:
-        params["supportedlang"] = "japanese"
-    
+def load_next_page():
+    """「もっと見る」: 次ページ（先読み済みならキャッシュから）を結果に追加し、さらに次を先読み"""
+    query = st.session_state.page_query
+    next_offset = st.session_state.page_offset + PAGE_SIZE
     try:
-        res = requests.get(base_url, params=params, headers=HEADERS)
-        try:
-            data = res.json()
-        except:
-            # APIからの応答が不正な場合は空リストを返す
-            return []
-        soup = BeautifulSoup(data.get("results_html", ""), "html.parser")
-        rows = soup.select("a.search_result_row")
-        
-        games = []
-        for row in rows:
-            try:
-                tag_str = row.get("data-ds-tagids", "[]")
-                try:
-                    game_tag_ids = json.loads(tag_str)
-                except:
-                    continue
-                
-                if not is_genre_match(game_tag_ids, target_tag_ids, exclude_tag_ids):
-                    continue
-                
-                title = row.select_one(".title").text.strip()
-                link = row.get("href")
-                app_id = extract_app_id(link)
-                
-                img_tag = row.select_one("img")
-                img_src = img_tag.get("src") or img_tag.get("data-src") if img_tag else None
-                if img_src:
-                    img_src = img_src.split("?")[0].replace("capsule_sm_120", "header")
-                
-                # 価格（Coming Soonは未定のことが多い）
-                price = "価格未定"
-                if row.select_one(".discount_final_price"):
-                    price = row.select_one(".discount_final_price").text.strip()
-                elif row.select_one(".search_price"):
-                    price_text = row.select_one(".search_price").text.strip()
-                    if price_text:
-                        price = price_text
-                
-                # リリース予定日
-                date = "Coming Soon"
-                date_tag = row.select_one(".search_released")
-                if date_tag:
-                    date = date_tag.text.strip() or "Coming Soon"
-                
-                games.append({
-                    "app_id": app_id,
-                    "title": title,
-                    "link": link,
-                    "image": img_src,
-                    "price": price,
-                    "review_count": 0,  # Coming Soonはレビューなし
-                    "review_desc": "Coming Soon",
-                    "date": date,
-                    "is_coming_soon": True,
-                })
-            except:
-                continue
-        
-        return games
-    except Exception as e:
-        st.error(f"Coming Soon検索エラー: {e}")
-        return []
-
-
-def enrich_game_data(game: dict) -> dict:
-    """APIからゲームの詳細データを取得して追加"""
-    app_id = game.get("app_id")
-    if not app_id:
-        return game
-    
-    steam_data = get_app_details(app_id)
-    if steam_data.get("success"):
-        game["is_jp_supported"] = steam_data.get("is_japanese_supported", False)
-        game["description"] = steam_data.get("short_description", "")
-        
-        preview = extract_preview_urls(steam_data)
-        game["video_url"] = preview.get("video_url")
-        game["screenshots"] = preview.get("screenshots", [])
-    else:
-        game["is_jp_supported"] = bool(re.search(r'[ぁ-んァ-ン]', game.get("title", "")))
-        game["description"] = ""
-        game["video_url"] = None
-        game["screenshots"] = []
-    
-    # Coming Soonの場合は期待度ラベル、それ以外は注目度ラベル
-    if game.get("is_coming_soon"):
-        # Games-Popularity.com APIからフォロワー数を取得
-        follower_count = get_follower_count(app_id)
-        game["follower_count"] = follower_count
-        game["attention_label"] = calc_expectation_label(follower_count)
-        # 体験版の有無を追加
-        if steam_data.get("success"):
-            game["has_demo"] = len(steam_data.get("demos", [])) > 0
-        else:
-            game["has_demo"] = False
-    else:
-        game["attention_label"] = calc_attention_label(
-            game.get("review_count", 0),
-            game.get("review_desc", "")
-        )
-    
-    return game
-
+        new_games, has_more = load_page(query, next_offset)
+    except SearchError as e:
+        # ページ送りの状態は変えない（もう一度押せば同じページを取得し直す）
+        st.error(str(e))
+        return
 
+    current_results = SESSION_RESULTS.get(results_key())
+    seen_ids = {game.app_id for game in current_results}
+    SESSION_RESULTS.put(results_key(), current_results + [
+        game for game in new_games if game.app_id not in seen_ids
+    ])
+    st.session_state.page_offset = next_offset
+    # 絞り込みで1件も残らなかったページでも、上流に続きがあればページ送りを続ける
+    st.session_state.has_more_pages = has_more
+    if has_more:
+        prefetch_page(query, next_offset + PAGE_SIZE)
 
 
-
-# ----------------------------------------------------
-# 🎬 メイン処理
-# ----------------------------------------------------
+cards_rendered = False  # このランでカードを逐次表示済みか
 
 if search_btn or treasure_btn:
-    # レートリミット: 3秒のクールダウン
-    import time as _time
-    if 'last_search_time' not in st.session_state:
-        st.session_state.last_search_time = 0
-    
-    current_time = _time.time()
-    cooldown_seconds = 3
-    time_since_last = current_time - st.session_state.last_search_time
-    
-    if time_since_last < cooldown_seconds:
-        remaining = int(cooldown_seconds - time_since_last) + 1
-        st.warning(f"⏳ 少し待ってから再度検索してください（あと{remaining}秒）")
+    # レート制限は上流ホストごとに全セッション・全プロセスで共有（http_client）。
+    # Steamが連続でエラーを返して呼び出しを止めている間は検索しない
+    store_retry_after = retry_after("store.steampowered.com")
+    if store_retry_after > 0:
+        st.warning(f"⏳ Steamが混み合っています。少し待ってから再度検索してください（あと{int(store_retry_after) + 1}秒）")
         st.stop()
     
-    st.session_state.last_search_time = current_time
-    
     use_jp_only = ("日本語" in jp_mode)
     results = []
     
@@ -1161,6 +902,16 @@ if search_btn or treasure_btn:
     # 結果データを格納する変数
     enriched_results = []
     
+    # 検索結果キャッシュ（最新・未来モードのみ。古代はランダムなため対象外）
+    query_key = None
+    cached_results = None
+
+    # ページ送りの条件（最新・未来モードのみ）
+    page_query = None
+    page_offset = 0
+    # 上流（検索API・カタログ）に次のページがあるか。絞り込み後の件数ではなく上流の結果で判定する
+    has_more = False
+    
     # Coming Soonモードの場合
     if is_coming_soon_mode:
         # 未来検索のメッセージを表示
@@ -1176,20 +927,35 @@ if search_btn or treasure_btn:
         offset_options = [0, 50, 100]
         future_offset = random.choice(offset_options)
         
-        results = search_coming_soon(
-            selected_tags, exclude_tags, start_offset=future_offset, only_japanese=use_jp_only
+        page_query = make_page_query("coming_soon", selected_tags, exclude_tags, only_japanese=use_jp_only)
+        page_offset = future_offset
+        query_key = make_query_key(
+            "coming_soon", selected_tags, exclude_tags, only_japanese=use_jp_only, start_offset=future_offset
         )
-        
-        # 結果がなければオフセット0で再試行
-        if not results and future_offset > 0:
-            time.sleep(0.3)  # レート制限回避
-            results = search_coming_soon(
-                selected_tags, exclude_tags, start_offset=0, only_japanese=use_jp_only
+        cached_page = get_cached_page(query_key)
+        if cached_page is None:
+            results, has_more = run_search_page(
+                "coming_soon", selected_tags, exclude_tags, start_offset=future_offset, only_japanese=use_jp_only
             )
+            
+            # 結果がなければオフセット0で再試行
+            if not results and future_offset > 0:
+                page_offset = 0
+                query_key = make_query_key(
+                    "coming_soon", selected_tags, exclude_tags, only_japanese=use_jp_only, start_offset=0
+                )
+                cached_page = get_cached_page(query_key)
+                if cached_page is None:
+                    results, has_more = run_search_page(
+                        "coming_soon", selected_tags, exclude_tags, start_offset=0, only_japanese=use_jp_only
+                    )
+        if cached_page is not None:
+            cached_results, has_more = cached_page
+            results = cached_results
         
         if results:
             st.markdown(f'#### {get_icon_html("treasure", 28)} 発見したアーティファクト ({len(results)}個)', unsafe_allow_html=True)
-            st.caption("各カードの「詳細を見る」を開くと動画やスクリーンショットが確認できます")
+            st.caption("一覧の下の「詳細を見る」でカードを選ぶと動画やスクリーンショットが確認できます")
     
     # 過去の秘宝モードの場合
     elif treasure_btn:
@@ -1203,45 +969,62 @@ if search_btn or treasure_btn:
             bar.progress((i + 1) * 20)
             time.sleep(0.05)
         
-        # 最低20件見つかるまで検索
+        # 最低20件見つかるまで検索（複数の深度を並列に探索）
         min_results = 20
-        max_retries = 30  # 最大試行回数を増やす
-        all_results = []
+        max_retries = 30  # 探索する深度の最大数
         
-        for attempt in range(max_retries):
-            random_offset = random.randint(0, 100) * 50  # より広い範囲から検索
-            status_text.markdown(f"### 🎰 探索中: 深度 {random_offset}m (発見: {len(all_results)}個/{min_results}個)")
-            
-            found_games = search_steam_survivor(
+        scan_session_id = current_session_id()
+
+        def fetch_depth(offset):
+            # 探索は低い優先度でストアのスケジューラーに並べる（他のユーザーの表示を優先）
+            with request_context(SCAN, session_id=scan_session_id):
+                future = HOST_SCHEDULERS[STORE_HOST].submit(
+                    fetch_search_page, "released", selected_tags, exclude_tags,
+                    min_reviews, max_reviews, offset, use_jp_only
+                )
+            try:
+                return future.result()[0]
+            except JobDropped:
+                return []
+        
+        def update_status(offset, found_count):
+            status_text.markdown(f"### 🎰 探索中: 深度 {offset}m (発見: {found_count}個/{min_results}個)")
+
+        # 探索中の検索エラー（ワーカースレッドでは表示できないため、ここで受け取って表示する）
+        scan_errors = []
+
+        def report_error(offset, error):
+            scan_errors.append(error)
+            status_text.markdown(f"### 🎰 探索中: 深度 {offset}m で通信エラー（{len(scan_errors)}件）")
+        
+        catalog = get_catalog()
+        if catalog is not None:
+            # ローカルカタログからランダムに抽出（ネットワークなし）
+            all_results = catalog.search_random(
                 selected_tags, exclude_tags, min_reviews=min_reviews, max_reviews=max_reviews,
-                start_offset=random_offset, only_japanese=use_jp_only
+                only_japanese=use_jp_only, count=min_results
+            )
+        else:
+            all_results = scan_offsets(
+                fetch_depth, random_offsets(max_retries), min_results,
+                on_update=update_status, on_error=report_error,
             )
-            
-            if found_games:
-                # 重複を避けてリストに追加
-                for game in found_games:
-                    if game["app_id"] not in [g["app_id"] for g in all_results]:
-                        all_results.append(game)
-                
-                # 20件以上見つかったら終了
-                if len(all_results) >= min_results:
-                    results = all_results
-                    break
-            
-            time.sleep(0.3)
         
         # 見つかった分だけ表示（20件未満でも可）
         if all_results:
             results = all_results
             status_text.success(f"🎉 お宝発見！ {len(results)}個のアーティファクトを見つけたよ！")
             bar.empty()
+        elif scan_errors:
+            status_text.error(str(scan_errors[-1]))
+            bar.empty()
         else:
             status_text.error("深い地層まで探しましたが、条件に合うアーティファクトが見つかりませんでした…。")
             bar.empty()
         
         if results:
             st.markdown(f'#### {get_icon_html("treasure", 28)} 発見したアーティファクト ({len(results)}個)', unsafe_allow_html=True)
-            st.caption("各カードの「詳細を見る」を開くと動画やスクリーンショットが確認できます")
+            st.caption("一覧の下の「詳細を見る」でカードを選ぶと動画やスクリーンショットが確認できます")
     
     else:
         # 通常検索モード
@@ -1252,59 +1035,118 @@ if search_btn or treasure_btn:
             <div style="text-align:center; font-weight:bold; margin-bottom:10px;">お宝を探索中...</div>
         """, unsafe_allow_html=True)
         
-        results = search_steam_survivor(
-            selected_tags, exclude_tags, min_reviews=min_reviews, max_reviews=max_reviews,
-            start_offset=0, only_japanese=use_jp_only
+        # カタログが古ければ（新しいリリースが載っていない可能性があるため）Steamの検索を使う。
+        # 情報源は page_query に保存し、「もっと見る」でも同じ情報源で続ける
+        catalog = get_latest_catalog()
+        source = "catalog" if catalog is not None else "search"
+        page_query = make_page_query(
+            "released", selected_tags, exclude_tags, min_reviews, max_reviews, use_jp_only, source=source
         )
+        query_key = make_query_key(
+            "released", selected_tags, exclude_tags, min_reviews, max_reviews, use_jp_only, start_offset=0,
+            source=source,
+        )
+        cached_page = get_cached_page(query_key)
+        if cached_page is not None:
+            cached_results, has_more = cached_page
+            results = cached_results
+        elif catalog is not None:
+            # ローカルカタログから検索（ネットワークなし）
+            results, has_more = catalog.search_latest_page(
+                selected_tags, exclude_tags, min_reviews=min_reviews, max_reviews=max_reviews,
+                start_offset=0, only_japanese=use_jp_only
+            )
+        else:
+            results, has_more = run_search_page(
+                "released", selected_tags, exclude_tags, min_reviews=min_reviews, max_reviews=max_reviews,
+                start_offset=0, only_japanese=use_jp_only
+            )
         
         if results:
             st.markdown(f'#### {get_icon_html("treasure", 28)} 発見したアーティファクト ({len(results)}個)', unsafe_allow_html=True)
-            st.caption("各カードの「詳細を見る」を開くと動画やスクリーンショットが確認できます")
+            st.caption("一覧の下の「詳細を見る」でカードを選ぶと動画やスクリーンショットが確認できます")
     
     # 結果がある場合は詳細データ取得
     if results:
-        # 並列処理で高速化（最大8件同時取得）
-        enriched_results = [None] * len(results)
-        completed_count = 0
-        
-        def enrich_with_index(args):
-            idx, game = args
-            return idx, enrich_game_data(game)
-        
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = {executor.submit(enrich_with_index, (i, game)): i for i, game in enumerate(results)}
-            
-            for future in as_completed(futures):
-                idx, enriched_game = future.result()
-                enriched_results[idx] = enriched_game
-                completed_count += 1
-                
-                # 冒険者の位置を更新
-                progress_pct = int((completed_count / len(results)) * 85)
-                anim_placeholder.markdown(f"""
-                    <div class="adventure-container">
-                        <div class="adventurer" style="left: {progress_pct}%;"></div>
-                    </div>
-                    <div style="text-align:center; font-weight:bold; margin-bottom:10px;">お宝を探索中... ({completed_count}/{len(results)})</div>
-                """, unsafe_allow_html=True)
+        # ホストごとのスケジューラーで並行取得（ホストごとの同時接続数は config で制限）
+        def update_progress(completed_count, total):
+            # 冒険者の位置を更新
+            progress_pct = int((completed_count / total) * 85)
+            anim_placeholder.markdown(f"""
+                <div class="adventure-container">
+                    <div class="adventurer" style="left: {progress_pct}%;"></div>
+                </div>
+                <div style="text-align:center; font-weight:bold; margin-bottom:10px;">お宝を探索中... ({completed_count}/{total})</div>
+            """, unsafe_allow_html=True)
+
+        if cached_results is not None:
+            # キャッシュ済みの結果は詳細データ取得済み（または遅延モードの結果）
+            enriched_results = results
+        elif use_lazy_enrichment("coming_soon" if is_coming_soon_mode else "released", use_jp_only):
+            # 遅延モード: 検索結果だけで表示し、詳細はカードを開いたときに取得
+            enriched_results = mark_lazy(results, use_jp_only)
+            if query_key is not None:
+                store_results(query_key, enriched_results, has_more)
+        elif config.STREAM_RENDER:
+            # 取得できたカードから順に、あらかじめ確保した枠へ描画（並び順は検索結果のまま）
+            card_slots = create_card_slots(len(results))
+            enriched_results = enrich_all(
+                results,
+                on_progress=update_progress,
+                on_result=lambda idx, game: render_game_card(game, card_slots[idx], idx),
+            )
+            cards_rendered = True
+            if query_key is not None:
+                store_results(query_key, enriched_results, has_more)
+        else:
+            enriched_results = enrich_all(results, on_progress=update_progress)
+            if query_key is not None:
+                store_results(query_key, enriched_results, has_more)
         
         # アニメーションを終了
         anim_placeholder.empty()
         
         # 結果をセッションに保存
-        st.session_state.search_results = enriched_results
+        SESSION_RESULTS.put(results_key(), enriched_results)
+        st.session_state.page_query = page_query
+        st.session_state.page_offset = page_offset
+        st.session_state.has_more_pages = page_query is not None and has_more
+
+        # 次ページを先読み（「もっと見る」を押したときに待たずに表示できるように）
+        if st.session_state.has_more_pages:
+            prefetch_page(page_query, page_offset + PAGE_SIZE)
     
     elif not treasure_btn and not results:
         st.warning("条件に合うゲームが見つかりませんでした。")
-        st.session_state.search_results = []
+        SESSION_RESULTS.discard(results_key())
+        st.session_state.page_query = None
 
-# セッションに保存された結果を表示
-if 'search_results' in st.session_state and st.session_state.search_results:
-    # グリッド表示
-    cols = st.columns(4)
-    for i, game in enumerate(st.session_state.search_results):
-        render_game_card(game, cols[i % 4], i)
-        
-        if (i + 1) % 4 == 0 and i + 1 < len(st.session_state.search_results):
-            st.write("")
-            cols = st.columns(4)
\ No newline at end of file
+# セッションに保存された結果を表示（このランで逐次表示済みなら再描画しない）
+session_results = SESSION_RESULTS.get(results_key())
+if session_results:
+    # バックグラウンドで取得済みになったレビュー概要を注目度ラベルに反映
+    apply_cached_review_summaries(session_results)
+    if not cards_rendered:
+        # グリッド表示（全カードを1つの要素で描画）
+        render_game_grid(session_results)
+    # 詳細の表示（操作が必要な部分だけウィジェットで描画）
+    render_details_picker(session_results)
+
+# もっと見る（最新・未来モード）
+if session_results and st.session_state.get("page_query") and st.session_state.get("has_more_pages"):
+    st.write("")
+    more_label = "🔮 さらに先の未来を観測する" if st.session_state.page_query["mode"] == "coming_soon" else "📜 さらに過去の章を読む"
+    st.button(more_label, on_click=load_next_page, use_container_width=True)
+
+# ----------------------------------------------------
+# 🛠️ デバッグパネル（URLに ?debug=1 を付けたときのみ表示）
+# ----------------------------------------------------
+if st.query_params.get("debug") == "1":
+    with st.expander("🛠️ メトリクス", expanded=False):
+        st.caption("処理段階ごとの所要時間")
+        st.dataframe(metrics.STAGE_LATENCY.summary(), use_container_width=True)
+        st.caption("上流APIの所要時間")
+        st.dataframe(metrics.UPSTREAM_LATENCY.summary(), use_container_width=True)
+        st.caption("セッションの検索結果（メモリ上の保持量）")
+        st.json(SESSION_RESULTS.stats())
+        st.code(metrics.render_text(), language="text")
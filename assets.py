@@ -0,0 +1,177 @@
+"""
+アセットレジストリ
+- アイコン画像を表示サイズに縮小・data URI 化した状態でプロセスごとに1度だけ保持
+- バッジアイコンは1枚のCSSスプライトにまとめ、ページ全体で1回だけ送信
+- 大きな画像（背景・冒険者・ロゴ）は static/ から内容ハッシュ付きURLで配信
+"""
+
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+
+import streamlit as st
+from PIL import Image
+
+import config
+
+ICON_DIR = "img"
+STATIC_DIR = "static"
+
+# Streamlitの静的ファイル配信のURLプレフィックス（static/ 以下に対応）
+STATIC_URL_PREFIX = "app/static/"
+
+# ページアイコン（favicon）の保持サイズ
+PAGE_ICON_SIZE = 64
+
+# 高DPIディスプレイ向けに表示サイズの何倍で保持するか
+PIXEL_DENSITY = 2
+
+# バッジ（注目度・期待度）の表示サイズ
+BADGE_ICON_SIZE = 16
+
+# スプライトに含めるバッジアイコン
+BADGE_ICON_NAMES = (
+    "legendary_treasurebox",
+    "gold_treasurebox",
+    "silver_treasurebox",
+    "bronze_treasurebox",
+    "scales_treasurebox",
+    "demon_treasurebox",
+    "unexplored_treasurebox",
+    "gem",
+    "sprout",
+    "tower_nayuta",
+    "tower_sun_v2",
+    "tower_moon_v2",
+    "tower_star",
+)
+
+
+def _encode_png(image: Image.Image) -> str:
+    """画像をPNGの data URI に変換"""
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def _use_static_serving() -> bool:
+    """大きな画像を静的ファイルURLで参照するかどうか"""
+    if config.STATIC_ASSET_MODE in ("static", "inline"):
+        return config.STATIC_ASSET_MODE == "static"
+    return bool(st.get_option("server.enableStaticServing"))
+
+
+class AssetRegistry:
+    """表示サイズに縮小済みのアイコン、バッジ用CSSスプライト、静的ファイルURLを保持"""
+
+    def __init__(self, icon_dir: str = ICON_DIR, static_dir: str = STATIC_DIR):
+        self.icon_dir = icon_dir
+        self.static_dir = static_dir
+        self._lock = threading.Lock()
+        self._icons = {}  # (名前, 表示サイズ) → data URI（存在しない場合は ""）
+        self._sprite = None  # (CSS, スプライトに含まれるアイコン名の集合)
+        self._static = {}  # (static/ からの相対パス, 配信方法) → URL（存在しない場合は ""）
+        self._page_icon = None
+
+    def _load_icon(self, icon_name: str, size: int):
+        """アイコンを表示サイズ×PIXEL_DENSITYの正方形に縮小して返す（無ければ None）"""
+        path = os.path.join(self.icon_dir, f"{icon_name}.png")
+        if not os.path.exists(path):
+            return None
+        pixels = size * PIXEL_DENSITY
+        with Image.open(path) as image:
+            return image.convert("RGBA").resize((pixels, pixels), Image.LANCZOS)
+
+    def icon_data_uri(self, icon_name: str, size: int) -> str:
+        """表示サイズに縮小済みアイコンの data URI（存在しない場合は ""）"""
+        key = (icon_name, size)
+        uri = self._icons.get(key)
+        if uri is None:
+            image = self._load_icon(icon_name, size)
+            uri = _encode_png(image) if image is not None else ""
+            with self._lock:
+                self._icons[key] = uri
+        return uri
+
+    def _build_sprite(self):
+        """バッジアイコンを横一列に並べたスプライトとCSSを作成"""
+        size = BADGE_ICON_SIZE
+        cell = size * PIXEL_DENSITY
+        icons = [(name, self._load_icon(name, size)) for name in BADGE_ICON_NAMES]
+        icons = [(name, image) for name, image in icons if image is not None]
+        if not icons:
+            return "", frozenset()
+
+        sprite = Image.new("RGBA", (cell * len(icons), cell))
+        for i, (_, image) in enumerate(icons):
+            sprite.paste(image, (cell * i, 0))
+
+        rules = [
+            f".badge-icon {{ display: inline-block; width: {size}px; height: {size}px; "
+            f"background-image: url({_encode_png(sprite)}); "
+            f"background-size: {size * len(icons)}px {size}px; background-repeat: no-repeat; "
+            f"vertical-align: -2px; margin-right: 2px; }}"
+        ]
+        for i, (name, _) in enumerate(icons):
+            rules.append(f".badge-icon-{name} {{ background-position: -{size * i}px 0; }}")
+        return "\n".join(rules), frozenset(name for name, _ in icons)
+
+    def _get_sprite(self):
+        if self._sprite is None:
+            with self._lock:
+                if self._sprite is None:
+                    self._sprite = self._build_sprite()
+        return self._sprite
+
+    def badge_sprite_css(self) -> str:
+        """バッジスプライトのCSS（ページのスタイルに1度だけ埋め込む）"""
+        return self._get_sprite()[0]
+
+    def badge_icon_html(self, icon_name: str) -> str:
+        """スプライト上のバッジアイコンを参照するHTMLタグ（存在しない場合は ""）"""
+        if icon_name not in self._get_sprite()[1]:
+            return ""
+        return f'<span class="badge-icon badge-icon-{icon_name}"></span>'
+
+    def static_url(self, relative_path: str) -> str:
+        """
+        static/ 以下のファイルの参照URL（存在しない場合は ""）
+
+        静的ファイル配信が有効なら内容ハッシュ付きURL（内容が変わるまでブラウザキャッシュを再利用）、
+        無効なら base64 の data URI を返す。
+        """
+        use_static = _use_static_serving()
+        key = (relative_path, use_static)
+        url = self._static.get(key)
+        if url is None:
+            path = os.path.join(self.static_dir, relative_path)
+            if not os.path.exists(path):
+                url = ""
+            else:
+                with open(path, "rb") as f:
+                    content = f.read()
+                if use_static:
+                    version = hashlib.sha1(content).hexdigest()[:12]
+                    url = f"{STATIC_URL_PREFIX}{relative_path}?v={version}"
+                else:
+                    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                    url = f"data:{mime};base64," + base64.b64encode(content).decode()
+            with self._lock:
+                self._static[key] = url
+        return url
+
+    def page_icon(self, path: str = "icon.png"):
+        """ページアイコン用に縮小した画像（存在しない場合は None）"""
+        if self._page_icon is None and os.path.exists(path):
+            with Image.open(path) as image:
+                icon = image.convert("RGBA")
+            icon.thumbnail((PAGE_ICON_SIZE, PAGE_ICON_SIZE), Image.LANCZOS)
+            self._page_icon = icon
+        return self._page_icon
+
+
+# プロセス共通のレジストリ
+REGISTRY = AssetRegistry()
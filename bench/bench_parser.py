@@ -0,0 +1,96 @@
+"""
+検索結果パーサーのベンチマーク
+- 従来の BeautifulSoup(html.parser) + select_one 方式と search_parser（lxml 1パス）を比較
+- 両者の抽出結果が一致することも確認する
+- ツールチップからのレビュー数の抽出が従来の正規表現の連鎖と一致することも確認する
+
+使い方（リポジトリ直下で実行）:
+    python -m bench.bench_parser [--rows 50] [--repeat 200]
+"""
+
+import argparse
+import json
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from bench.fixtures import make_results_html
+from search import parse_review_summary
+from search_parser import parse_search_rows
+
+
+def parse_with_bs4(results_html: str) -> list:
+    """従来の app.py と同じ抽出処理（比較用）"""
+    soup = BeautifulSoup(results_html, "html.parser")
+    records = []
+    for row in soup.select("a.search_result_row"):
+        try:
+            tag_ids = json.loads(row.get("data-ds-tagids", "[]"))
+        except ValueError:
+            tag_ids = None
+        title_tag = row.select_one(".title")
+        review_tag = row.select_one(".search_review_summary")
+        img_tag = row.select_one("img")
+        final_price = row.select_one(".discount_final_price")
+        search_price = row.select_one(".search_price")
+        released = row.select_one(".search_released")
+        records.append({
+            "link": row.get("href"),
+            "tag_ids": tag_ids,
+            "title": title_tag.text.strip() if title_tag else None,
+            "review_tooltip": review_tag.get("data-tooltip-html", "") if review_tag else None,
+            "image": img_tag.get("src") or img_tag.get("data-src") if img_tag else None,
+            "final_price": final_price.text.strip() if final_price else None,
+            "search_price": search_price.text.strip() if search_price else None,
+            "released": released.text.strip() if released else None,
+        })
+    return records
+
+
+def review_count_legacy(tooltip: str) -> int:
+    """従来の app.py と同じレビュー数の抽出（比較用。最後のフォールバックもカンマ区切りを含める）"""
+    match = re.search(r"([\d,]+)件のユーザーレビュー", tooltip)
+    if not match:
+        match = re.search(r"([\d,]+)\s*user reviews", tooltip, re.IGNORECASE)
+    if not match:
+        match = re.search(r"([\d,]+)[^\d]*[\d]+%", tooltip)
+    if match:
+        return int(match.group(1).replace(",", ""))
+    numbers = re.findall(r"([\d,]+)", tooltip)
+    return int(numbers[0].replace(",", "")) if numbers else 0
+
+
+def _time_per_call(func, arg, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50, help="1ページあたりの行数")
+    parser.add_argument("--repeat", type=int, default=200, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    pages = [make_results_html(args.rows, seed=0), make_results_html(args.rows, seed=1, coming_soon=True)]
+    for page in pages:
+        assert parse_search_rows(page) == parse_with_bs4(page), "抽出結果が一致しません"
+        for row in parse_search_rows(page):
+            if row["review_tooltip"]:
+                assert parse_review_summary(row["review_tooltip"])[0] == review_count_legacy(row["review_tooltip"]), (
+                    f"レビュー数の抽出結果が一致しません: {row['review_tooltip']}"
+                )
+
+    for label, page in zip(("最新/古代", "未来"), pages):
+        bs4_sec = _time_per_call(parse_with_bs4, page, args.repeat)
+        lxml_sec = _time_per_call(parse_search_rows, page, args.repeat)
+        print(
+            f"[{label}] {args.rows}行: BeautifulSoup {bs4_sec * 1000:.2f}ms / "
+            f"lxml {lxml_sec * 1000:.2f}ms (x{bs4_sec / lxml_sec:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+タグクエリエンジンのベンチマーク
+- 合成カタログ（既定10万件）に対して TagIndex.query の所要時間を計測
+- 行ごとの TagFilter 判定と結果が一致することも確認する
+
+使い方（リポジトリ直下で実行）:
+    python -m bench.bench_tag_index [--apps 100000] [--repeat 50]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from tag_index import TagFilter, TagIndex
+
+ROGUELIKE, DECKBUILDER, HORROR, INDIE = 1716, 32322, 1667, 492
+_TAG_POOL = np.array([19, 122, 9, 599, 21, 1664, HORROR, ROGUELIKE, 4255, 1628, 29482, 1646,
+                      DECKBUILDER, 4231, 4434, 1663, 1774, 1756, 9001, 4115, 3799, 5716, 4085])
+
+
+def make_catalog(apps: int, seed: int = 0):
+    """タグ列（CSR）・レビュー数・日本語フラグを持つ合成カタログ"""
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(3, 15, size=apps)
+    tag_offsets = np.concatenate([[0], np.cumsum(counts)])
+    tag_ids = rng.choice(_TAG_POOL, size=int(tag_offsets[-1])).astype(np.int32)
+    review_count = rng.integers(0, 5000, size=apps).astype(np.int32)
+    japanese = rng.random(apps) < 0.4
+    return tag_offsets, tag_ids, review_count, japanese
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", type=int, default=100000, help="カタログの件数")
+    parser.add_argument("--repeat", type=int, default=50, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    tag_offsets, tag_ids, review_count, japanese = make_catalog(args.apps)
+
+    start = time.perf_counter()
+    index = TagIndex(tag_offsets, tag_ids)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # 「ローグライク OR デッキ構築, NOT ホラー, 51〜500件, 日本語」
+    def run_query():
+        base_mask = (review_count >= 51) & (review_count <= 500) & japanese
+        return index.query(include_any=(ROGUELIKE, DECKBUILDER), exclude=(HORROR,), base_mask=base_mask)
+
+    result = run_query()
+    tag_filter = TagFilter(include_any=(ROGUELIKE, DECKBUILDER), exclude=(HORROR,))
+    expected = [
+        i for i in range(args.apps)
+        if 51 <= review_count[i] <= 500 and japanese[i]
+        and tag_filter.matches(tag_ids[tag_offsets[i]:tag_offsets[i + 1]].tolist())
+    ]
+    assert result.tolist() == expected, "行ごとの判定と結果が一致しません"
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        run_query()
+    query_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    print(f"{args.apps}件: インデックス構築 {build_ms:.1f}ms / クエリ {query_ms:.2f}ms ({len(result)}件一致)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+ベンチマーク用のSteam APIフィクスチャ
+- 実際の results_html と同じ構造の行を乱数シードから決定的に生成
+- appdetails / appreviews / games-popularity のJSONも同様に生成
+- 記録済みコーパス（bench/record_fixtures.py）がない場合の代替として使う
+"""
+
+import html
+import json
+import random
+
+_TAG_POOL = [19, 122, 9, 599, 21, 1664, 1667, 1716, 4255, 1628, 29482, 1646, 32322,
+             4231, 4434, 615955, 1663, 1774, 4885, 1756, 9001, 4115, 3799, 5716,
+             4085, 1695, 1662, 4328, 7332, 87918, 1702, 597, 701, 699, 1685]
+
+_REVIEW_TOOLTIPS = [
+    "圧倒的に好評<br>このゲームの {count} 件のユーザーレビューのうち 97% が好評です",
+    "非常に好評<br>このゲームの {count} 件のユーザーレビューのうち 88% が好評です",
+    "やや好評<br>このゲームの {count} 件のユーザーレビューのうち 74% が好評です",
+    "賛否両論<br>このゲームの {count} 件のユーザーレビューのうち 55% が好評です",
+    "Very Positive<br>92% of the {count} user reviews for this game are positive.",
+    # 「件のユーザーレビュー」「user reviews」を含まない形式（数字の後の%で判定）
+    "非常に好評<br>ユーザーレビュー {count} 件中 84% が好評です",
+    "Mostly Positive<br>{count} reviews, 76% positive",
+    # レビュー数の後に別の数字が続く形式
+    "Mixed<br>{count} user reviews, 55% positive",
+]
+
+
+def make_search_row(rng: random.Random, app_id: int, coming_soon: bool = False) -> str:
+    """検索結果1行分（a.search_result_row）のHTMLを生成"""
+    tag_ids = rng.sample(_TAG_POOL, rng.randint(3, 12)) + [492]
+    rng.shuffle(tag_ids)
+    title = html.escape(f"Arcana Test Game {app_id}")
+    capsule = f"https://shared.cloudflare.steamstatic.com/store_item_assets/steam/apps/{app_id}/capsule_sm_120.jpg?t=17000{app_id % 1000}"
+
+    if coming_soon:
+        released = rng.choice(["2026年12月", "近日登場", "2027年 第1四半期", ""])
+        review_html = ""
+    else:
+        released = f"20{rng.randint(15, 25)}年{rng.randint(1, 12)}月{rng.randint(1, 28)}日"
+        if rng.random() < 0.15:
+            review_html = ""
+        else:
+            count = f"{rng.randint(1, 250000):,}"
+            tooltip = html.escape(rng.choice(_REVIEW_TOOLTIPS).format(count=count))
+            review_html = f'<span class="search_review_summary positive" data-tooltip-html="{tooltip}"></span>'
+
+    roll = rng.random()
+    if coming_soon and roll < 0.5:
+        price_html = '<div class="col search_price responsive_secondrow"></div>'
+    elif roll < 0.1:
+        price_html = '<div class="col search_price responsive_secondrow">無料プレイ</div>'
+    elif roll < 0.3:
+        price_html = (
+            '<div class="discount_block search_discount_block" data-discount="40">'
+            '<div class="discount_pct">-40%</div>'
+            '<div class="discount_prices"><div class="discount_original_price">¥ 1,500</div>'
+            '<div class="discount_final_price">¥ 900</div></div></div>'
+        )
+    else:
+        price = rng.choice([300, 520, 980, 1200, 1980, 2800])
+        price_html = (
+            '<div class="discount_block search_discount_block no_discount" data-discount="0">'
+            f'<div class="discount_prices"><div class="discount_final_price">¥ {price:,}</div></div></div>'
+        )
+
+    return (
+        f'<a href="https://store.steampowered.com/app/{app_id}/Arcana_Test_Game/?snr=1_7_7_230_150_1" '
+        f'data-ds-appid="{app_id}" data-ds-itemkey="App_{app_id}" '
+        f'data-ds-tagids="{json.dumps(tag_ids)}" data-ds-crtrids="[4]" '
+        'onmouseover="GameHover( this, event, \'global_hover\', {&quot;type&quot;:&quot;app&quot;});" '
+        'class="search_result_row ds_collapse_flag " >'
+        f'<div class="col search_capsule"><img src="{capsule}" srcset="{capsule} 1x"></div>'
+        '<div class="responsive_search_name_combined">'
+        f'<div class="col search_name ellipsis"><span class="title">{title}</span>'
+        '<div><span class="platform_img win"></span></div></div>'
+        f'<div class="col search_released responsive_secondrow">{released}</div>'
+        f'<div class="col search_reviewscore responsive_secondrow">{review_html}</div>'
+        '<div class="col search_price_discount_combined responsive_secondrow">'
+        f'<div class="col search_discount_and_price responsive_secondrow">{price_html}</div></div>'
+        '</div><div style="clear: left;"></div></a>'
+    )
+
+
+def make_results_html(count: int = 50, seed: int = 0, coming_soon: bool = False) -> str:
+    """count 行分の results_html を生成"""
+    rng = random.Random(seed)
+    first_id = 2000000 + seed * 1000
+    return "\n".join(make_search_row(rng, first_id + i, coming_soon) for i in range(count))
+
+
+def make_search_payload(count: int = 50, seed: int = 0, start: int = 0, coming_soon: bool = False) -> dict:
+    """/search/results/?infinite=1 のJSONレスポンスを生成"""
+    return {
+        "success": 1,
+        "results_html": make_results_html(count, seed, coming_soon),
+        "total_count": 100000,
+        "start": start,
+    }
+
+
+def make_app_details_payload(app_id: int) -> dict:
+    """/api/appdetails のJSONレスポンスを生成"""
+    rng = random.Random(app_id)
+    cdn = f"https://shared.cloudflare.steamstatic.com/store_item_assets/steam/apps/{app_id}"
+    return {
+        str(app_id): {
+            "success": True,
+            "data": {
+                "type": "game",
+                "name": f"Arcana Test Game {app_id}",
+                "steam_appid": app_id,
+                "short_description": "迷宮の奥深くに眠る秘宝を求めて冒険するローグライクアクション。" * rng.randint(1, 3),
+                "supported_languages": "英語, 日本語<strong>*</strong>" if rng.random() < 0.7 else "英語",
+                "header_image": f"{cdn}/header.jpg",
+                "movies": [{
+                    "id": app_id * 10,
+                    "name": "Trailer",
+                    "thumbnail": f"{cdn}/movie.293x165.jpg",
+                    "webm": {"480": f"{cdn}/movie480.webm", "max": f"{cdn}/movie_max.webm"},
+                    "mp4": {"480": f"{cdn}/movie480.mp4", "max": f"{cdn}/movie_max.mp4"},
+                }] if rng.random() < 0.8 else [],
+                "screenshots": [
+                    {"id": i, "path_thumbnail": f"{cdn}/ss_{i}.600x338.jpg", "path_full": f"{cdn}/ss_{i}.1920x1080.jpg"}
+                    for i in range(rng.randint(3, 12))
+                ],
+                "genres": [{"id": "23", "description": "インディー"}],
+                "release_date": {"coming_soon": False, "date": "2024年5月1日"},
+                "recommendations": {"total": rng.randint(0, 5000)},
+                "demos": [{"appid": app_id + 1}] if rng.random() < 0.3 else [],
+            },
+        }
+    }
+
+
+def make_reviews_payload(app_id: int) -> dict:
+    """/appreviews/<app_id>?json=1 のJSONレスポンスを生成"""
+    rng = random.Random(app_id)
+    total = rng.randint(0, 5000)
+    positive = int(total * rng.uniform(0.3, 1.0))
+    return {
+        "success": 1,
+        "query_summary": {
+            "num_reviews": 0,
+            "review_score": 8,
+            "review_score_desc": "非常に好評",
+            "total_positive": positive,
+            "total_negative": total - positive,
+            "total_reviews": total,
+        },
+        "reviews": [],
+    }
+
+
+def make_followers_payload(app_id: int) -> dict:
+    """games-popularity.com のフォロワー数APIのJSONレスポンスを生成"""
+    rng = random.Random(app_id)
+    return {"history": [{"date": "2026-10-01", "followers": rng.randint(0, 20000)}]}
@@ -0,0 +1,67 @@
+"""
+実際のSteam APIレスポンスを bench/corpus/ に記録
+- スタブサーバーは記録済みファイルを合成レスポンスより優先して返す
+- ネットワークに接続できる環境で一度だけ実行し、コーパスを固定する
+
+使い方（リポジトリ直下で実行）:
+    python -m bench.record_fixtures [--tags ローグライク] [--pages 2] [--apps 30]
+"""
+
+import argparse
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import http_client
+from bench.stub_server import CORPUS_DIR, corpus_name
+from search import HEADERS, SEARCH_URL, build_search_params, extract_app_id, resolve_tag_ids
+from search_parser import parse_search_rows
+
+
+def record(url: str, params: dict = None, headers: dict = None) -> dict:
+    """1リクエスト分を取得してコーパスに保存"""
+    res = http_client.get(url, params=params, headers=headers)
+    res.raise_for_status()
+    parts = urlsplit(res.url)
+    query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    path = os.path.join(CORPUS_DIR, corpus_name(parts.path, query))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(res.text)
+    print(f"recorded: {os.path.basename(path)}")
+    return res.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam APIレスポンスの記録")
+    parser.add_argument("--tags", nargs="*", default=["ローグライク"], help="検索タグ名")
+    parser.add_argument("--pages", type=int, default=2, help="モードごとに記録する検索ページ数")
+    parser.add_argument("--apps", type=int, default=30, help="詳細を記録するアプリ数")
+    args = parser.parse_args()
+
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    target_tag_ids = resolve_tag_ids(args.tags)
+
+    app_ids = []
+    for mode in ("released", "coming_soon"):
+        for page in range(args.pages):
+            params = build_search_params(mode, target_tag_ids, start_offset=page * 50)
+            data = record(SEARCH_URL, params, HEADERS)
+            for row in parse_search_rows(data.get("results_html", "")):
+                app_id = extract_app_id(row["link"] or "")
+                if app_id and app_id not in app_ids:
+                    app_ids.append(app_id)
+
+    for app_id in app_ids[:args.apps]:
+        record("https://store.steampowered.com/api/appdetails", {"appids": app_id, "l": "japanese", "cc": "JP"})
+        record(f"https://store.steampowered.com/appreviews/{app_id}",
+               {"json": 1, "language": "all", "purchase_type": "all", "num_per_page": 0})
+        try:
+            record(f"https://games-popularity.com/swagger/api/game/followers/{app_id}")
+        except Exception as e:
+            print(f"skipped followers for {app_id}: {e}")
+
+    print(json.dumps({"apps": len(app_ids[:args.apps]), "corpus": CORPUS_DIR}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+オフライン E2E ベンチマーク
+- スタブサーバー（bench/stub_server.py）をプロセス内で起動し、上流ホストをそこへ向けて計測する
+- 検索・詳細取得の単体シナリオと、最新 / 未来 / 古代 の各フローを同時ユーザー数ごとに実行
+- p50 / p95 / p99 / 平均と失敗数を表示し、JSON に書き出す
+
+使い方（リポジトリ直下で実行）:
+    python -m bench.run_bench [--users 1 4 16] [--rounds 5] [--latency-ms 120] [--jitter-ms 60]
+                              [--error-rate 0.02] [--warm] [--pause-ms 0] [--enrich-engine scheduler]
+                              [--output bench_output.json]
+
+--enrich-engine threadpool で、詳細データ取得を以前の方式（呼び出しごとの8スレッドのプール）に
+差し替えて比較できる。ラウンドを続けて実行すると上流のレート制限が律速になるため、
+利用者ごとの待ち時間を比べるときは --pause-ms でラウンドの間隔を空ける（レート制限のトークンが戻る）。
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 実環境のキャッシュ・カタログを汚さないよう、アプリのモジュールを読み込む前に向け先を変える
+_WORK_DIR = tempfile.mkdtemp(prefix="steam_arcana_bench_")
+os.environ.setdefault("STEAM_ARCANA_CACHE_PATH", os.path.join(_WORK_DIR, "cache.sqlite3"))
+os.environ.setdefault("STEAM_ARCANA_CATALOG_MODE", "off")
+
+import http_client  # noqa: E402
+from bench.stub_server import StubConfig, start_stub_server  # noqa: E402
+from cache import CACHE  # noqa: E402
+from enrichment import enrich_all, enrich_game_data  # noqa: E402
+from records import GameRecord  # noqa: E402
+from result_cache import SEARCH_RESULT_CACHE, get_cached_results, make_query_key, store_results  # noqa: E402
+from search import search_coming_soon, search_steam_survivor  # noqa: E402
+from treasure import random_offsets, scan_offsets  # noqa: E402
+
+UPSTREAM_HOSTS = ("store.steampowered.com", "games-popularity.com")
+
+TAGS = ["ローグライク"]
+EXCLUDE_TAGS = []
+
+
+def enrich_all_threadpool(games: list) -> list:
+    """以前の詳細データ取得（呼び出しごとに ThreadPoolExecutor(max_workers=8) で enrich_game_data を実行）。比較用"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(enrich_game_data, games))
+
+
+ENRICH_ENGINES = {"scheduler": enrich_all, "threadpool": enrich_all_threadpool}
+_enrich = enrich_all
+MIN_REVIEWS, MAX_REVIEWS = 0, 9999999
+
+
+# ------------------------------------------------------------
+# シナリオ（app.py の各フローと同じ呼び出し順）
+# ------------------------------------------------------------
+def scenario_search_released(user: int) -> int:
+    return len(search_steam_survivor(TAGS, EXCLUDE_TAGS, MIN_REVIEWS, MAX_REVIEWS, start_offset=user * 50))
+
+
+def scenario_search_coming_soon(user: int) -> int:
+    return len(search_coming_soon(TAGS, EXCLUDE_TAGS, start_offset=user * 50))
+
+
+def scenario_enrich_game_data(user: int) -> int:
+    game = GameRecord(app_id=2000000 + user, title="", link="", image=None, price="", price_value=None,
+                      review_count=0, review_desc="", date="")
+    enrich_game_data(game)
+    return 1
+
+
+def _search_and_enrich(query_key: tuple, search):
+    results = get_cached_results(query_key)
+    if results is not None:
+        return len(results)
+    results = _enrich(search())
+    store_results(query_key, results)
+    return len(results)
+
+
+def flow_latest(user: int) -> int:
+    query_key = make_query_key("released", TAGS, EXCLUDE_TAGS, MIN_REVIEWS, MAX_REVIEWS, True, start_offset=0)
+    return _search_and_enrich(
+        query_key, lambda: search_steam_survivor(TAGS, EXCLUDE_TAGS, MIN_REVIEWS, MAX_REVIEWS, start_offset=0)
+    )
+
+
+def flow_coming_soon(user: int) -> int:
+    offset = random.choice([0, 50, 100])
+    query_key = make_query_key("coming_soon", TAGS, EXCLUDE_TAGS, only_japanese=True, start_offset=offset)
+    return _search_and_enrich(query_key, lambda: search_coming_soon(TAGS, EXCLUDE_TAGS, start_offset=offset))
+
+
+def flow_treasure(user: int) -> int:
+    def fetch_depth(offset):
+        return search_steam_survivor(TAGS, EXCLUDE_TAGS, MIN_REVIEWS, MAX_REVIEWS, start_offset=offset)
+
+    results = scan_offsets(fetch_depth, random_offsets(20), min_results=20)
+    return len(_enrich(results[:20]))
+
+
+SCENARIOS = {
+    "search_released": scenario_search_released,
+    "search_coming_soon": scenario_search_coming_soon,
+    "enrich_game_data": scenario_enrich_game_data,
+    "flow_latest": flow_latest,
+    "flow_coming_soon": flow_coming_soon,
+    "flow_treasure": flow_treasure,
+}
+
+
+# ------------------------------------------------------------
+# 計測
+# ------------------------------------------------------------
+def percentile(values: list, pct: float) -> float:
+    """最近傍法によるパーセンタイル"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def clear_caches():
+    CACHE.clear()
+    SEARCH_RESULT_CACHE.clear()
+
+
+def run_scenario(func, users: int, rounds: int, warm: bool, stub_config: StubConfig, pause_ms: float = 0) -> dict:
+    """users 人が同時に func を1回ずつ実行するラウンドを rounds 回繰り返す（ラウンドの間は pause_ms 空ける）"""
+    latencies = []
+    failures = 0
+    empty = 0
+    lock = threading.Lock()
+    requests_before, errors_before = stub_config.requests, stub_config.errors
+
+    def one(user):
+        nonlocal failures, empty
+        start = time.perf_counter()
+        try:
+            count = func(user)
+        except Exception as e:
+            print(f"  ! {func.__name__}: {e}")
+            with lock:
+                failures += 1
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not count:
+                empty += 1
+
+    if warm:
+        clear_caches()
+        for user in range(users):
+            one(user)
+        latencies.clear()
+        failures = empty = 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for round_index in range(rounds):
+            if round_index and pause_ms:
+                time.sleep(pause_ms / 1000)
+            if not warm:
+                clear_caches()
+            list(pool.map(one, range(users)))
+    wall = time.perf_counter() - started - pause_ms / 1000 * max(rounds - 1, 0)
+
+    summary = {
+        "users": users,
+        "runs": len(latencies) + failures,
+        "failures": failures,
+        "empty_results": empty,
+        "upstream_requests": stub_config.requests - requests_before,
+        "injected_errors": stub_config.errors - errors_before,
+        "throughput_per_sec": round(len(latencies) / wall, 2) if wall else 0,
+    }
+    if latencies:
+        summary.update({
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "mean_ms": round(statistics.fmean(latencies), 1),
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="オフライン E2E ベンチマーク")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--users", nargs="*", type=int, default=[1, 4, 16], help="同時ユーザー数")
+    parser.add_argument("--rounds", type=int, default=5, help="同時実行ラウンド数")
+    parser.add_argument("--latency-ms", type=float, default=120, help="スタブの平均応答遅延")
+    parser.add_argument("--jitter-ms", type=float, default=60, help="スタブの遅延のゆらぎ（±）")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="スタブが 429/503 を返す割合")
+    parser.add_argument("--warm", action="store_true", help="キャッシュを温めた状態で計測する")
+    parser.add_argument("--pause-ms", type=float, default=0, help="ラウンドの間隔（レート制限のトークンを戻す）")
+    parser.add_argument("--enrich-engine", default="scheduler", choices=list(ENRICH_ENGINES),
+                        help="詳細データ取得の方式（threadpool は以前の8スレッドのプール）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_output.json", help="結果のJSON出力先")
+    args = parser.parse_args()
+
+    global _enrich
+    _enrich = ENRICH_ENGINES[args.enrich_engine]
+    random.seed(args.seed)
+    stub_config = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed)
+    server, base_url = start_stub_server(stub_config=stub_config)
+    for host in UPSTREAM_HOSTS:
+        http_client.set_upstream_override(host, base_url)
+
+    results = []
+    try:
+        for name in args.scenarios:
+            for users in args.users:
+                summary = run_scenario(SCENARIOS[name], users, args.rounds, args.warm, stub_config, args.pause_ms)
+                summary["scenario"] = name
+                results.append(summary)
+                print(
+                    f"{name:<20} users={users:<3} p50={summary.get('p50_ms', '-')}ms "
+                    f"p95={summary.get('p95_ms', '-')}ms p99={summary.get('p99_ms', '-')}ms "
+                    f"mean={summary.get('mean_ms', '-')}ms fail={summary['failures']} "
+                    f"upstream={summary['upstream_requests']}"
+                )
+    finally:
+        server.shutdown()
+
+    report = {
+        "settings": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "rounds": args.rounds,
+            "warm": args.warm,
+            "pause_ms": args.pause_ms,
+            "enrich_engine": args.enrich_engine,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を {args.output} に保存しました")
+
+
+if __name__ == "__main__":
+    main()
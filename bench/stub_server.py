@@ -0,0 +1,174 @@
+"""
+Steam API スタブサーバー
+- 記録済みコーパス（bench/corpus/）を返し、なければ bench/fixtures で合成したレスポンスを返す
+- 応答遅延（平均・ジッター）とエラー注入（429 / 503）を設定可能
+
+使い方（リポジトリ直下で実行）:
+    python -m bench.stub_server [--port 8765] [--latency-ms 120] [--jitter-ms 60] [--error-rate 0.02]
+
+アプリを向ける場合:
+    STEAM_ARCANA_UPSTREAM_OVERRIDES="store.steampowered.com=http://127.0.0.1:8765,games-popularity.com=http://127.0.0.1:8765" \\
+        streamlit run app.py
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench import fixtures
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+_REVIEWS_PATH_RE = re.compile(r"^/appreviews/(\d+)")
+_FOLLOWERS_PATH_RE = re.compile(r"^/swagger/api/game/followers/(\d+)")
+
+
+def corpus_name(path: str, query: dict) -> str:
+    """リクエストに対応するコーパスのファイル名（record_fixtures.py と共通）"""
+    if path.startswith("/search/results"):
+        kind = "comingsoon" if query.get("filter") == "comingsoon" else "released"
+        return f"search_{kind}_{query.get('start', '0')}.json"
+    if path.startswith("/api/appdetails"):
+        return f"appdetails_{query.get('appids', '0')}.json"
+    match = _REVIEWS_PATH_RE.match(path)
+    if match:
+        return f"appreviews_{match.group(1)}.json"
+    match = _FOLLOWERS_PATH_RE.match(path)
+    if match:
+        return f"followers_{match.group(1)}.json"
+    return ""
+
+
+def synthesize(path: str, query: dict):
+    """コーパスがない場合の合成レスポンス（対応しないパスは None）"""
+    if path.startswith("/search/results"):
+        coming_soon = query.get("filter") == "comingsoon"
+        start = int(query.get("start", 0))
+        # 十分深いページは空（末尾）として扱う
+        if start >= 10000:
+            return {"success": 1, "results_html": "", "total_count": 10000, "start": start}
+        seed = start // 50 + (500 if coming_soon else 0)
+        return fixtures.make_search_payload(int(query.get("count", 50)), seed, start, coming_soon)
+    if path.startswith("/api/appdetails"):
+        return fixtures.make_app_details_payload(int(query.get("appids", 0)))
+    match = _REVIEWS_PATH_RE.match(path)
+    if match:
+        return fixtures.make_reviews_payload(int(match.group(1)))
+    match = _FOLLOWERS_PATH_RE.match(path)
+    if match:
+        return fixtures.make_followers_payload(int(match.group(1)))
+    return None
+
+
+class StubConfig:
+    """遅延とエラー注入の設定（実行中に変更可能）"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self) -> tuple:
+        """(遅延秒, エラーを返すか)"""
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+
+def make_handler(stub_config: StubConfig):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-Alive
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+            delay, fail = stub_config.draw()
+            if delay:
+                time.sleep(delay)
+            if fail:
+                status = random.choice((429, 503))
+                self._send(status, {"error": "injected"}, {"Retry-After": "0"})
+                return
+
+            name = corpus_name(parts.path, query)
+            corpus_path = os.path.join(CORPUS_DIR, name) if name else ""
+            if corpus_path and os.path.exists(corpus_path):
+                with open(corpus_path, "rb") as f:
+                    self._send_raw(200, f.read())
+                return
+
+            payload = synthesize(parts.path, query)
+            if payload is None:
+                self._send(404, {"error": "not found"})
+            else:
+                self._send(200, payload)
+
+        def _send(self, status: int, payload: dict, headers: dict = None):
+            self._send_raw(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers)
+
+        def _send_raw(self, status: int, body: bytes, headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # ベンチマーク中はアクセスログを出さない
+
+    return StubHandler
+
+
+class _StubServer(ThreadingHTTPServer):
+    # 既定の待ち行列（5）では同時に多数の接続を張ると SYN が捨てられ、再送の約1秒が応答時間に乗る
+    request_queue_size = 128
+
+
+def start_stub_server(port: int = 0, stub_config: StubConfig = None):
+    """
+    スタブサーバーをバックグラウンドスレッドで起動
+
+    Returns:
+        (server, base_url)  停止は server.shutdown()
+    """
+    server = _StubServer(("127.0.0.1", port), make_handler(stub_config or StubConfig()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam API スタブサーバー")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="平均応答遅延")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="遅延のゆらぎ（±）")
+    parser.add_argument("--error-rate", type=float, default=0, help="429/503 を返す割合")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.port, StubConfig(args.latency_ms, args.jitter_ms, args.error_rate))
+    print(f"stub server: {base_url} (Ctrl+C で終了)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+キャッシュモジュール
+- SQLite（WALモード）によるプロセス間共有キャッシュ
+- エントリ単位のTTL（失効後も最大許容期間内なら返しつつバックグラウンドで再取得）
+- プロセス内のサイズ上限付きTTLキャッシュ
+- ヒット / ミス / 破棄の件数をメトリクスに記録
+"""
+
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+import config
+from metrics import CACHE_EVICTIONS, CACHE_REQUESTS, FETCH_OUTCOMES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+_INDEX = "CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)"
+
+
+class PersistentCache:
+    """
+    同一ホストの全プロセスで共有するキー・バリューキャッシュ
+
+    値はJSONで保存する。SQLiteに書き込めない環境では常にミス扱いとなり、
+    呼び出し側はそのまま上流APIへフォールバックする。
+    失効したエントリは、プロセスで最初に開いたときと purge_every 回の書き込みごとに削除する
+    （ファイルが際限なく大きくならないように）。keep_stale で登録した名前空間は、失効後もその期間は残す。
+    """
+
+    def __init__(self, path: str, purge_every: int = 0):
+        self.path = path
+        self.purge_every = purge_every
+        self._stale_windows = {}  # 名前空間 → 失効後も残す秒数
+        self._local = threading.local()
+        self._writes = itertools.count(1)
+        self._opened = False
+        self._opened_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3の接続はスレッド間で共有できないためスレッドごとに持つ
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+            self._local.conn = conn
+            with self._opened_lock:
+                first_open, self._opened = not self._opened, True
+            if first_open and self.purge_every:
+                self.purge_expired()
+        return conn
+
+    def get(self, namespace: str, key) -> tuple:
+        """
+        キャッシュを参照
+
+        Returns:
+            (hit: bool, value)
+        """
+        entry = self.get_entry(namespace, key)
+        if entry is None or entry[1] < time.time():
+            return False, None
+        return True, entry[0]
+
+    def get_entry(self, namespace: str, key):
+        """
+        失効済みも含めてエントリを参照（stale-while-revalidate 用）
+
+        Returns:
+            (value, expires_at) または None
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, str(key)),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache read error ({namespace}:{key}): {e}")
+            return None
+
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, namespace: str, key, value, ttl: float):
+        """キャッシュに保存（ttl秒後に失効）"""
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, str(key), json.dumps(value, ensure_ascii=False), time.time() + ttl),
+            )
+        except sqlite3.Error as e:
+            print(f"Cache write error ({namespace}:{key}): {e}")
+            return
+        if self.purge_every and next(self._writes) % self.purge_every == 0:
+            self.purge_expired()
+
+    def delete(self, namespace: str, key):
+        """エントリを削除"""
+        try:
+            self._connect().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, str(key)))
+        except sqlite3.Error as e:
+            print(f"Cache delete error ({namespace}:{key}): {e}")
+
+    def keep_stale(self, namespace: str, seconds: float):
+        """名前空間のエントリを失効後も seconds 秒は削除しない（stale-while-revalidate 用）"""
+        self._stale_windows[namespace] = max(seconds, self._stale_windows.get(namespace, 0))
+
+    def purge_expired(self, grace: float = 0) -> int:
+        """
+        失効してから grace 秒以上経ったエントリを削除して削除件数を返す
+
+        keep_stale で登録した名前空間は、その期間（grace より長ければ）が過ぎるまで残す。
+        """
+        now = time.time()
+        windows = dict(self._stale_windows)
+        try:
+            conn = self._connect()
+            placeholders = ",".join("?" * len(windows))
+            deleted = conn.execute(
+                f"DELETE FROM cache WHERE expires_at < ? AND namespace NOT IN ({placeholders})",
+                (now - grace, *windows),
+            ).rowcount
+            for namespace, window in windows.items():
+                deleted += conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND expires_at < ?",
+                    (namespace, now - max(grace, window)),
+                ).rowcount
+        except sqlite3.Error as e:
+            print(f"Cache purge error: {e}")
+            return 0
+        CACHE_EVICTIONS.inc(deleted, cache="persistent", reason="expired")
+        return deleted
+
+    def clear(self, namespace: str = None):
+        """キャッシュを全削除（namespace指定時はその名前空間のみ）"""
+        try:
+            if namespace is None:
+                self._connect().execute("DELETE FROM cache")
+            else:
+                self._connect().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+        except sqlite3.Error as e:
+            print(f"Cache clear error: {e}")
+
+
+# プロセス共通のキャッシュインスタンス
+CACHE = PersistentCache(config.CACHE_PATH, purge_every=config.CACHE_PURGE_EVERY)
+
+
+# 失効済みエントリのバックグラウンド再取得用ワーカー
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=config.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_REFRESHING = set()  # 再取得中の (namespace, key)
+_REFRESHING_LOCK = threading.Lock()
+
+
+def persistent_cache(namespace: str, ttl: float, classify=None, negative_ttl: float = 0, error_ttl: float = 0,
+                     max_staleness: float = 0):
+    """
+    単一引数（キー）関数の結果を永続キャッシュに保存するデコレータ
+
+    classify: 結果を受け取り "ok" / "miss" / "error" を返す関数（省略時は常に "ok"）
+      - ok: 取得成功。ttl 秒保存
+      - miss: 上流が「存在しない」と返した恒久的な欠損。negative_ttl 秒保存
+      - error: タイムアウト・429・5xx などの一時的な失敗。error_ttl 秒保存（0 なら保存しない）
+    max_staleness: 0 より大きければ stale-while-revalidate を行う。
+      失効後 max_staleness 秒以内の成功結果はそのまま返し、再取得はバックグラウンドで1回だけ行う。
+      それより古い場合は呼び出し元で同期的に取得する。
+    結果の内訳はメトリクス（FETCH_OUTCOMES）に記録する。
+    """
+    def decorator(func):
+        ttls = {"ok": ttl, "miss": negative_ttl, "error": error_ttl}
+        if max_staleness > 0:
+            CACHE.keep_stale(namespace, max_staleness)
+
+        def fetch_and_store(key, keep_stale: bool = False):
+            value = func(key)
+            outcome = classify(value) if classify is not None else "ok"
+            FETCH_OUTCOMES.inc(cache=namespace, outcome=outcome)
+            # バックグラウンド再取得の一時的な失敗で、手元の成功結果を上書きしない
+            if ttls[outcome] > 0 and not (keep_stale and outcome == "error"):
+                CACHE.set(namespace, key, value, ttls[outcome])
+            return value
+
+        def refresh(key):
+            try:
+                fetch_and_store(key, keep_stale=True)
+            except Exception as e:
+                print(f"Cache refresh error ({namespace}:{key}): {e}")
+            finally:
+                with _REFRESHING_LOCK:
+                    _REFRESHING.discard((namespace, key))
+
+        def schedule_refresh(key):
+            with _REFRESHING_LOCK:
+                if (namespace, key) in _REFRESHING:
+                    return
+                _REFRESHING.add((namespace, key))
+            _REFRESH_EXECUTOR.submit(refresh, key)
+
+        @wraps(func)
+        def wrapper(key):
+            entry = CACHE.get_entry(namespace, key)
+            if entry is not None:
+                value, expires_at = entry
+                now = time.time()
+                if expires_at >= now:
+                    CACHE_REQUESTS.inc(cache=namespace, result="hit")
+                    return value
+                is_ok = classify is None or classify(value) == "ok"
+                if max_staleness > 0 and is_ok and now - expires_at <= max_staleness:
+                    CACHE_REQUESTS.inc(cache=namespace, result="stale")
+                    schedule_refresh(key)
+                    return value
+
+            CACHE_REQUESTS.inc(cache=namespace, result="miss")
+            return fetch_and_store(key)
+
+        def peek(key):
+            """キャッシュ済み（有効期限内）の値を返す。なければ None（取得はしない）"""
+            entry = CACHE.get_entry(namespace, key)
+            if entry is None or entry[1] < time.time():
+                return None
+            return entry[0]
+
+        wrapper.uncached = func
+        wrapper.peek = peek
+        wrapper.cache_clear = lambda: CACHE.clear(namespace)
+        return wrapper
+
+    return decorator
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    プロセス内で共有するサイズ上限付きTTLキャッシュ（スレッドセーフ）
+
+    上限を超えた場合は最も長く参照されていないエントリから破棄する。
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "ttl"):
+        self.name = name  # メトリクスのラベル
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key → (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                CACHE_EVICTIONS.inc(cache=self.name, reason="expired")
+                entry = None
+            if entry is None:
+                CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return default
+            self._data.move_to_end(key)
+        CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.inc(cache=self.name, reason="capacity")
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
@@ -0,0 +1,436 @@
+"""
+ローカルカタログ
+- Steam検索結果（インディー）をタグごとに巡回し、列指向のファイル群として保存
+- 各列は .npy 形式でメモリマップして読み込む（起動時にデータを読み込まない）
+- 巡回は差分更新（新しいリリースから順に、既知の行だけのページに達したら停止）
+- 差分更新では既知の行のレビュー数・価格などが古いままになるため、実行のたびに一部のタグを末尾まで巡回し直す
+  （最も長く巡回し直していないタグから順に。定期実行すればカタログ全体が一巡する）
+- 巡回の完了時刻を meta.json に記録し、古くなったカタログは最新モードに使わない（config.CATALOG_MAX_AGE）
+- 最新・古代モードの検索をネットワークなしで実行
+
+使い方（リリース日の新しい順に巡回・更新。cron などで定期実行する）:
+    python catalog.py crawl [--full] [--max-pages N] [--tags 1716,4255] [--refresh-tags N]
+    python catalog.py stats
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+
+import config
+import http_client
+from search import (
+    HEADERS, INDIE_TAG_ID, SEARCH_URL, TAGS,
+    build_search_params, extract_games, resolve_tag_ids,
+)
+from records import GameRecord
+from search_parser import parse_search_rows
+from steam_api import calc_attention_label
+from tag_index import TagIndex
+from treasure import SEARCH_LIMITER
+
+CATALOG_VERSION = 1
+PAGE_SIZE = 50
+
+# 数値列（列名 → dtype）
+NUMERIC_COLUMNS = {
+    "app_id": np.int32,
+    "review_count": np.int32,
+    "price_value": np.int32,  # 不明は -1
+    "release_day": np.int32,  # 1970-01-01 からの日数（不明は -1）
+    "japanese": np.uint8,  # 日本語対応（supportedlang=japanese の検索に出現したか）
+}
+
+# 文字列列（UTF-8 を連結した .npy とオフセット列で保持）
+STRING_COLUMNS = ("title", "link", "image", "price", "date", "review_desc")
+
+_DATE_RE = re.compile(r'(\d{4})年\s*(\d{1,2})月(?:\s*(\d{1,2})日)?')
+
+
+def parse_release_day(date_text: str) -> int:
+    """「2023年12月26日」形式の日付を 1970-01-01 からの日数に変換（不明は -1）"""
+    match = _DATE_RE.search(date_text or "")
+    if not match:
+        return -1
+    year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3) or 1)
+    try:
+        return int(np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D").astype(np.int64))
+    except ValueError:
+        return -1
+
+
+def all_tag_ids() -> list:
+    """tags.json の全タグID（インディーを含む、重複なし）"""
+    tag_ids = resolve_tag_ids(list(TAGS.keys()))
+    return list(dict.fromkeys([INDIE_TAG_ID] + tag_ids))
+
+
+# ============================================
+# 読み込み
+# ============================================
+
+class Catalog:
+    """メモリマップした列ファイル群への読み取り専用ビュー"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        self.columns = {name: load(name) for name in NUMERIC_COLUMNS}
+        self.tag_offsets = load("tag_offsets")
+        self.tag_ids = load("tag_ids")
+        self.strings = {name: (load(f"{name}.offsets"), load(f"{name}.utf8")) for name in STRING_COLUMNS}
+        self._tag_index = None
+
+    def __len__(self) -> int:
+        return len(self.columns["app_id"])
+
+    @property
+    def crawled_at(self) -> float:
+        """最後に巡回が完了した時刻（crawled_at を記録する前のカタログは最終書き込み時刻）"""
+        if "crawled_at" in self.meta:
+            return self.meta["crawled_at"] or 0
+        return self.meta.get("updated_at", 0)
+
+    def string(self, name: str, idx: int) -> str:
+        offsets, blob = self.strings[name]
+        return bytes(blob[offsets[idx]:offsets[idx + 1]]).decode("utf-8")
+
+    def tags_of(self, idx: int) -> list:
+        return self.tag_ids[self.tag_offsets[idx]:self.tag_offsets[idx + 1]].tolist()
+
+    @property
+    def tag_index(self) -> TagIndex:
+        """タグの転置インデックス（初回参照時に構築）"""
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self.tag_offsets, self.tag_ids)
+        return self._tag_index
+
+    def match(self, target_tag_ids=(), exclude_tag_ids=(), min_reviews=0, max_reviews=9999999,
+              only_japanese=True, any_tag_ids=()) -> np.ndarray:
+        """
+        条件に合うアプリのインデックスを返す
+
+        target_tag_ids はすべて含むもの（Steam検索の tags パラメータと同じAND条件）、
+        any_tag_ids はいずれかを含むもの
+        """
+        review_count = self.columns["review_count"]
+        base_mask = (review_count >= min_reviews) & (review_count <= max_reviews)
+        if only_japanese:
+            base_mask &= self.columns["japanese"].astype(bool)
+        return self.tag_index.query(
+            include_any=any_tag_ids, include_all=target_tag_ids, exclude=exclude_tag_ids, base_mask=base_mask
+        )
+
+    def to_game(self, idx: int) -> GameRecord:
+        """検索結果と同じ形式のゲーム情報に変換"""
+        review_count = int(self.columns["review_count"][idx])
+        review_desc = self.string("review_desc", idx)
+        price_value = int(self.columns["price_value"][idx])
+        return GameRecord(
+            app_id=int(self.columns["app_id"][idx]),
+            title=self.string("title", idx),
+            link=self.string("link", idx),
+            image=self.string("image", idx) or None,
+            price=self.string("price", idx),
+            price_value=price_value if price_value >= 0 else None,
+            review_count=review_count,
+            review_desc=review_desc,
+            date=self.string("date", idx),
+            attention_label=calc_attention_label(review_count, review_desc),
+        )
+
+    def search_latest_page(self, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999,
+                           start_offset=0, only_japanese=True, count=PAGE_SIZE) -> tuple:
+        """最新モード: 条件に合うものをリリース日の新しい順に返す（(ゲームリスト, 次のページがあるか)）"""
+        indexes = self.match(resolve_tag_ids(tags), resolve_tag_ids(exclude_tags_list),
+                             min_reviews, max_reviews, only_japanese)
+        release_day = np.asarray(self.columns["release_day"])[indexes]
+        order = np.argsort(-release_day, kind="stable")
+        games = [self.to_game(int(i)) for i in indexes[order][start_offset:start_offset + count]]
+        return games, start_offset + count < len(indexes)
+
+    def search_latest(self, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999,
+                      start_offset=0, only_japanese=True, count=PAGE_SIZE) -> list:
+        """最新モード: 条件に合うものをリリース日の新しい順に返す"""
+        return self.search_latest_page(tags, exclude_tags_list, min_reviews, max_reviews,
+                                       start_offset, only_japanese, count)[0]
+
+    def search_random(self, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999,
+                      only_japanese=True, count=20) -> list:
+        """古代モード: 条件に合うものからランダムに返す"""
+        indexes = self.match(resolve_tag_ids(tags), resolve_tag_ids(exclude_tags_list),
+                             min_reviews, max_reviews, only_japanese)
+        picked = random.sample(range(len(indexes)), min(count, len(indexes)))
+        return [self.to_game(int(indexes[i])) for i in picked]
+
+    def to_records(self) -> dict:
+        """差分更新用に全件を {app_id: レコード} に展開"""
+        records = {}
+        for idx in range(len(self)):
+            record = {name: self.string(name, idx) for name in STRING_COLUMNS}
+            record.update({name: int(column[idx]) for name, column in self.columns.items()})
+            record["tag_ids"] = set(self.tags_of(idx))
+            records[record["app_id"]] = record
+        return records
+
+
+_loaded = {"mtime": None, "catalog": None}
+_load_lock = threading.Lock()
+
+
+def get_catalog(max_age: float = 0):
+    """
+    アプリから使うカタログを返す（無効化されているか未作成なら None）
+
+    max_age: 0 より大きければ、巡回の完了からこの秒数以上経ったカタログも None とする
+             （最新モードは新しいリリースが載っていないと困るため）
+    meta.json が更新されていれば（巡回で書き換えられたら）読み直す
+    """
+    if config.CATALOG_MODE == "off":
+        return None
+    meta_path = os.path.join(config.CATALOG_DIR, "meta.json")
+    try:
+        mtime = os.path.getmtime(meta_path)
+    except OSError:
+        return None
+
+    with _load_lock:
+        if _loaded["mtime"] != mtime:
+            try:
+                _loaded["catalog"] = Catalog(config.CATALOG_DIR)
+            except (OSError, ValueError) as e:
+                print(f"Catalog load error: {e}")
+                _loaded["catalog"] = None
+            _loaded["mtime"] = mtime
+        catalog = _loaded["catalog"]
+    if catalog is not None and max_age > 0 and time.time() - catalog.crawled_at > max_age:
+        return None
+    return catalog
+
+
+def get_latest_catalog():
+    """最新モード用のカタログ（古くなっていれば None。呼び出し側はSteamの検索を使う）"""
+    return get_catalog(max_age=config.CATALOG_MAX_AGE)
+
+
+# ============================================
+# 書き込み
+# ============================================
+
+def write_catalog(records: dict, directory: str, meta: dict):
+    """レコードを列ファイル群として書き出す（一時ディレクトリに書いてから差し替え）"""
+    app_ids = sorted(records)
+    rows = [records[app_id] for app_id in app_ids]
+
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    def save(name, array):
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+
+    for name, dtype in NUMERIC_COLUMNS.items():
+        save(name, np.array([row[name] for row in rows], dtype=dtype))
+
+    tag_lists = [sorted(row["tag_ids"]) for row in rows]
+    save("tag_offsets", np.cumsum([0] + [len(tags) for tags in tag_lists], dtype=np.int64))
+    save("tag_ids", np.array([tag for tags in tag_lists for tag in tags], dtype=np.int32))
+
+    for name in STRING_COLUMNS:
+        encoded = [(row[name] or "").encode("utf-8") for row in rows]
+        save(f"{name}.offsets", np.cumsum([0] + [len(b) for b in encoded], dtype=np.int64))
+        save(f"{name}.utf8", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({**meta, "version": CATALOG_VERSION, "count": len(rows)}, f, ensure_ascii=False)
+
+    old_dir = directory + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_dir)
+    os.rename(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _merge(records: dict, game: GameRecord, row_tag_ids: list) -> dict:
+    """巡回で得たゲーム情報を既存レコードに反映（タグと日本語フラグは累積）"""
+    record = records.get(game.app_id)
+    if record is None:
+        record = {"tag_ids": set(), "japanese": 0}
+        records[game.app_id] = record
+
+    record.update({
+        "app_id": game.app_id,
+        "title": game.title,
+        "link": game.link,
+        "image": game.image or "",
+        "price": game.price,
+        "price_value": game.price_value if game.price_value is not None else -1,
+        "review_count": game.review_count,
+        "review_desc": game.review_desc,
+        "date": game.date,
+        "release_day": parse_release_day(game.date),
+    })
+    record["tag_ids"].update(row_tag_ids or [])
+    return record
+
+
+def _crawl_tag(tag_id: int, only_japanese: bool, known_ids: set, max_pages: int = None, status: dict = None):
+    """
+    1タグ分の検索結果をリリース日の新しい順に巡回
+
+    known_ids が空でなければ、既知の行だけのページに達した時点で停止する（差分更新）
+    status: 渡すと、末尾（行のないページ）まで巡回できたときに status["complete"] = True を設定する
+    Yields:
+        (ゲーム情報, data-ds-tagids のタグIDリスト)
+    """
+    page = 0
+    while max_pages is None or page < max_pages:
+        SEARCH_LIMITER.acquire()
+        params = build_search_params("released", [tag_id], page * PAGE_SIZE, only_japanese)
+        try:
+            data = http_client.get(SEARCH_URL, params=params, headers=HEADERS).json()
+        except Exception as e:
+            print(f"Catalog crawl error (tag={tag_id}, page={page}): {e}")
+            return
+
+        rows = parse_search_rows(data.get("results_html", ""))
+        if not rows:
+            if status is not None:
+                status["complete"] = True
+            return
+
+        has_new = False
+        for row in rows:
+            for game in extract_games([row], "released", [], []):
+                has_new = has_new or game.app_id not in known_ids
+                yield game, row["tag_ids"]
+
+        if known_ids and not has_new:
+            return
+        page += 1
+
+
+def _pick_refresh(keys: list, refreshed_at: dict, count: int) -> set:
+    """巡回し直すタグ（最も長く巡回し直していないものから count 件）"""
+    return set(sorted(keys, key=lambda key: refreshed_at.get(key, 0))[:max(count, 0)])
+
+
+def crawl(tag_ids: list = None, full: bool = False, max_pages: int = None, directory: str = None,
+          refresh_tags: int = None):
+    """
+    全タグを巡回してカタログを作成・更新
+
+    full: 既存カタログを使わず作り直す
+    max_pages: タグごとの最大ページ数（省略時は末尾まで）
+    refresh_tags: 差分更新でも既知の行を含めて末尾まで巡回し直すタグ数（省略時は config.CATALOG_REFRESH_TAGS）
+    """
+    directory = directory or config.CATALOG_DIR
+    refresh_tags = config.CATALOG_REFRESH_TAGS if refresh_tags is None else refresh_tags
+    records = {}
+    previous_meta = {}
+    if not full and os.path.exists(os.path.join(directory, "meta.json")):
+        previous = Catalog(directory)
+        records = previous.to_records()
+        previous_meta = previous.meta
+
+    tag_ids = tag_ids or all_tag_ids()
+    # 巡回し直した時刻（タグID の文字列 → 時刻。日本語対応の巡回は "japanese"）
+    refreshed_at = dict(previous_meta.get("refreshed_at", {}))
+    keys = [str(tag_id) for tag_id in tag_ids] + ["japanese"]
+    # 新規作成（既存の行がない）も全タグを末尾まで巡回するため、巡回し直したものとして扱う
+    refresh = set(keys) if full or not records else _pick_refresh(keys, refreshed_at, refresh_tags)
+    # 巡回の途中で書き出すカタログは前回の完了時刻のまま（途中のカタログを新しいと見なさない）
+    meta = {"tags": tag_ids, "started_at": time.time(), "crawled_at": previous_meta.get("crawled_at"),
+            "refreshed_at": refreshed_at}
+
+    def finish_refresh(key, status):
+        # エラーやページ数の制限で末尾まで達しなかった巡回は、巡回し直したことにしない
+        if key in refresh and status.get("complete"):
+            refreshed_at[key] = time.time()
+
+    for tag_id in tag_ids:
+        if str(tag_id) in refresh:
+            known_ids = set()
+        else:
+            known_ids = {app_id for app_id, record in records.items() if tag_id in record["tag_ids"]}
+        found = 0
+        status = {}
+        for game, row_tag_ids in _crawl_tag(tag_id, False, known_ids, max_pages, status):
+            record = _merge(records, game, row_tag_ids)
+            record["tag_ids"].update((tag_id, INDIE_TAG_ID))
+            found += 1
+        finish_refresh(str(tag_id), status)
+        print(f"tag {tag_id}: {found} rows" + (" (refresh)" if str(tag_id) in refresh else ""))
+        # タグごとに書き出して途中から再開できるようにする
+        write_catalog(records, directory, {**meta, "updated_at": time.time()})
+
+    # 日本語対応（インディー全体を supportedlang=japanese で巡回）
+    if "japanese" in refresh:
+        known_ids = set()
+    else:
+        known_ids = {app_id for app_id, record in records.items() if record["japanese"]}
+    found = 0
+    status = {}
+    seen_ids = set()
+    for game, row_tag_ids in _crawl_tag(INDIE_TAG_ID, True, known_ids, max_pages, status):
+        record = _merge(records, game, row_tag_ids)
+        record["tag_ids"].add(INDIE_TAG_ID)
+        record["japanese"] = 1
+        seen_ids.add(game.app_id)
+        found += 1
+    if "japanese" in refresh and status.get("complete"):
+        # 末尾まで巡回し直して出てこなかった行は、日本語対応から外れた
+        for app_id, record in records.items():
+            if record["japanese"] and app_id not in seen_ids:
+                record["japanese"] = 0
+    finish_refresh("japanese", status)
+    print(f"japanese: {found} rows" + (" (refresh)" if "japanese" in refresh else ""))
+
+    now = time.time()
+    write_catalog(records, directory, {**meta, "updated_at": now, "crawled_at": now})
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam検索結果のローカルカタログ")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    crawl_parser = sub.add_parser("crawl", help="巡回してカタログを作成・差分更新")
+    crawl_parser.add_argument("--full", action="store_true", help="既存カタログを使わず作り直す")
+    crawl_parser.add_argument("--max-pages", type=int, default=None, help="タグごとの最大ページ数")
+    crawl_parser.add_argument("--tags", default=None, help="巡回するタグID（カンマ区切り、省略時は tags.json の全タグ）")
+    crawl_parser.add_argument("--refresh-tags", type=int, default=None,
+                              help="既知の行も含めて巡回し直すタグ数（省略時は STEAM_ARCANA_CATALOG_REFRESH_TAGS）")
+    sub.add_parser("stats", help="カタログの概要を表示")
+
+    args = parser.parse_args()
+    if args.command == "crawl":
+        tag_ids = [int(t) for t in args.tags.split(",")] if args.tags else None
+        total = crawl(tag_ids, full=args.full, max_pages=args.max_pages, refresh_tags=args.refresh_tags)
+        print(f"catalog: {total} apps -> {config.CATALOG_DIR}")
+    else:
+        catalog = get_catalog()
+        if catalog is None:
+            print(f"カタログがありません: {config.CATALOG_DIR}")
+            return
+        print(f"apps: {len(catalog)} / tags: {len(catalog.tag_ids)} / "
+              f"japanese: {int(np.count_nonzero(catalog.columns['japanese']))}")
+        print(f"updated_at: {time.ctime(catalog.meta.get('updated_at', 0))}")
+        print(f"crawled_at: {time.ctime(catalog.crawled_at)}")
+
+
+if __name__ == "__main__":
+    main()
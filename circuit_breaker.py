@@ -0,0 +1,93 @@
+"""
+サーキットブレーカー
+- 上流ホストが 429 / 5xx / 接続エラーを連続で返したら、一定時間そのホストへの呼び出しを止める
+- 状態はSQLiteに置き、同一ホストの全プロセスで共有する
+- 停止時間が過ぎたら試行（half-open）として全プロセスで同時に1件だけ通し、成功すれば復帰、失敗すれば再び停止する
+  （試行中であることは共有レコードのリースで表し、試行したプロセスが落ちてもリースの期限で解放される）
+"""
+
+import sqlite3
+import time
+
+from shared_state import SHARED_STATE, SharedState
+
+
+class CircuitBreaker:
+    """
+    failure_threshold: 停止するまでの連続失敗回数
+    open_seconds: 停止する秒数
+    trial_seconds: half-open の試行のリース期間（試行の結果が記録されないまま過ぎたら次の試行を通す）
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, open_seconds: float = 30,
+                 trial_seconds: float = None, state: SharedState = SHARED_STATE):
+        self.name = f"circuit:{name}"
+        self._trial_name = f"{self.name}:trial"
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.trial_seconds = open_seconds if trial_seconds is None else trial_seconds
+        self._state = state
+
+    def retry_after(self) -> float:
+        """停止中なら再開までの秒数、停止時間が過ぎていれば（half-open 含む） 0.0。状態は変更しない"""
+        try:
+            row = self._state.get(self.name)
+        except sqlite3.Error as e:
+            print(f"Circuit breaker error ({self.name}): {e}")
+            return 0.0
+        if row is None:
+            return 0.0
+        return max(0.0, row[1] - time.time())
+
+    def allow_request(self) -> float:
+        """
+        呼び出してよければ 0.0、だめなら待つべき秒数を返す
+
+        half-open では試行のリースを取得できた1件だけを通し、ほかは試行の結果が出るまで待たせる。
+        """
+        try:
+            # 通常時（失敗が閾値未満）は書き込みロックを取らない
+            row = self._state.get(self.name)
+            if row is None or row[0] < self.failure_threshold:
+                return 0.0
+            with self._state.transaction() as conn:
+                row = self._state.read(conn, self.name)
+                if row is None or row[0] < self.failure_threshold:
+                    return 0.0
+                now = time.time()
+                if row[1] > now:
+                    return row[1] - now  # 停止中
+                trial = self._state.read(conn, self._trial_name)
+                if trial is not None and trial[0] > now:
+                    return trial[0] - now  # 他の呼び出しが試行中
+                self._state.write(conn, self._trial_name, now + self.trial_seconds, 0)
+                return 0.0
+        except sqlite3.Error as e:
+            print(f"Circuit breaker error ({self.name}): {e}")
+            return 0.0
+
+    def record_success(self):
+        try:
+            # 通常時（失敗なし）は書き込みロックを取らない
+            row = self._state.get(self.name)
+            if row is None or row[0] == 0:
+                return
+            with self._state.transaction() as conn:
+                self._state.write(conn, self.name, 0, 0)
+                self._state.write(conn, self._trial_name, 0, 0)
+        except sqlite3.Error as e:
+            print(f"Circuit breaker error ({self.name}): {e}")
+
+    def record_failure(self):
+        try:
+            with self._state.transaction() as conn:
+                row = self._state.read(conn, self.name)
+                failures, opened_until = row if row is not None else (0, 0)
+                failures += 1
+                if failures >= self.failure_threshold:
+                    # half-open の試行の失敗も含め、閾値以上なら停止し直して試行のリースを解放する
+                    opened_until = time.time() + self.open_seconds
+                    self._state.write(conn, self._trial_name, 0, 0)
+                self._state.write(conn, self.name, failures, opened_until)
+        except sqlite3.Error as e:
+            print(f"Circuit breaker error ({self.name}): {e}")
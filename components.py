@@ -1,8 +1,13 @@
 import streamlit as st
 import random
-import os
 import html
-from utils import get_base64_image, get_icon_html
+from assets import REGISTRY
+from utils import get_icon_html
+import config
+from cache import TTLCache
+from metrics import timed
+from enrichment import load_details
+from records import GameRecord
 
 def get_badge_icon(attention_label: str) -> str:
     """注目度ラベルに応じたアイコン画像のHTMLタグを返す"""
@@ -38,196 +43,254 @@ def get_badge_icon(attention_label: str) -> str:
     elif "星の塔" in attention_label:
         icon_name = "tower_star"
         
-    path = f"img/{icon_name}.png"
-    if os.path.exists(path):
-        b64 = get_base64_image(path)
-        # ユーザーによる手動リサイズ済みのため16pxに統一
-        display_width = "16"
-        
-        return f'<img src="data:image/png;base64,{b64}" width="{display_width}" style="vertical-align: -2px; margin-right: 2px;">'
-    return ""
+    # スプライト上のアイコンを参照（画像本体はページCSSで1度だけ送信）
+    return REGISTRY.badge_icon_html(icon_name)
 
 
-def render_game_card(game: dict, col, idx: int):
-    """ゲームカードをレンダリング"""
-    with col:
-        app_id = game.get("app_id", 0)
-        
-        # 画像（XSS対策: URLをエスケープ）
-        img_url = html.escape(game.get("image") or "https://via.placeholder.com/460x215?text=No+Image")
-        
-        # レアリティ演出判定
-        attention = game.get("attention_label", "")
-        reveal_class = ""
-        if "伝説" in attention:
-            reveal_class = "reveal-legendary"
-        elif "那由多" in attention:
-            reveal_class = "reveal-nayuta"
-        elif "金" in attention:
-            reveal_class = "reveal-gold"
-        elif "太陽" in attention:
-            reveal_class = "reveal-sun"
-            
-        # 最初の4枚は優先読み込み、それ以降は遅延読み込み
-        loading_attr = 'eager' if idx < 4 else 'lazy'
-        priority_attr = 'fetchpriority="high"' if idx < 4 else ''
-        
-        if reveal_class:
-             # 特殊アニメーション付き画像
-             st.markdown(f'<img src="{img_url}" class="preview-image {reveal_class}" style="width:100%; object-fit:cover;" decoding="async" loading="{loading_attr}" {priority_attr}>', unsafe_allow_html=True)
+def create_card_slots(count: int, columns: int = 4) -> list:
+    """
+    グリッド（columns 列）のカード枠を先に確保して返す
+
+    枠はページ上の位置が固定されるため、後から任意の順序でカードを描画しても並び順は崩れない。
+    """
+    slots = []
+    cols = st.columns(columns)
+    for i in range(count):
+        slots.append(cols[i % columns].container())
+        if (i + 1) % columns == 0 and i + 1 < count:
+            st.write("")
+            cols = st.columns(columns)
+    return slots
+
+
+def _render_details(video_url, screenshots: list, description: str):
+    """詳細（説明文・動画・スクリーンショット）を描画"""
+    if description:
+        # XSS対策: 説明文をエスケープ
+        safe_description = html.escape(description)
+        st.markdown(f"_{safe_description}_")
+
+    if video_url:
+        if ".m3u8" in video_url:
+            # HLS形式: クライアントサイドで動的に読み込む（リロードなし）
+            # JavaScriptでボタンクリック時にプレイヤーを生成
+            video_component_html = f'''
+            <style>
+                html,body{{margin:0;padding:0;width:100%;height:100%;overflow:hidden;background:transparent}}
+                #player-container{{width:100%;height:100%;display:flex;align-items:center;justify-content:center}}
+                #load-btn{{
+                    background: linear-gradient(135deg, #3a3a5c 0%, #2a2a3c 100%);
+                    border: 1px solid #5a5a7a;
+                    color: #fff;
+                    padding: 12px 24px;
+                    border-radius: 8px;
+                    cursor: pointer;
+                    font-size: 14px;
+                    transition: all 0.2s;
+                }}
+                #load-btn:hover{{background: linear-gradient(135deg, #4a4a6c 0%, #3a3a4c 100%);}}
+                video{{max-width:100%;max-height:100%;width:auto;height:auto;object-fit:contain;border-radius:8px;outline:none}}
+            </style>
+            <div id="player-container">
+                <button id="load-btn" onclick="loadVideo()">📺 動画を読み込む</button>
+            </div>
+            <script src="https://cdn.jsdelivr.net/npm/hls.js@latest"></script>
+            <script>
+                function loadVideo() {{
+                    var container = document.getElementById('player-container');
+                    container.innerHTML = '<video id="hls-video" controls autoplay></video>';
+                    var video = document.getElementById('hls-video');
+                    if (Hls.isSupported()) {{
+                        var hls = new Hls();
+                        hls.loadSource('{video_url}');
+                        hls.attachMedia(video);
+                    }} else if (video.canPlayType('application/vnd.apple.mpegurl')) {{
+                        video.src = '{video_url}';
+                    }}
+                }}
+            </script>
+            '''
+            st.components.v1.html(video_component_html, height=225)
         else:
-             # 通常の画像
-             st.markdown(f'<img src="{img_url}" class="preview-image" style="width:100%; object-fit:cover;" decoding="async" loading="{loading_attr}" {priority_attr}>', unsafe_allow_html=True)
-        
+            st.video(video_url)
+
+    if screenshots:
+        # スクリーンショットを2列で表示（遅延読み込み）
+        ss_cols = st.columns(2)
+        for i, ss_url in enumerate(screenshots[:4]):
+            if ss_url:
+                # XSS対策: URLをエスケープ
+                safe_ss_url = html.escape(ss_url)
+                # loading="lazy" でネイティブ遅延読み込み
+                ss_cols[i % 2].markdown(
+                    f'<img src="{safe_ss_url}" loading="lazy" style="width:100%; border-radius:4px;">',
+                    unsafe_allow_html=True
+                )
+
+
+# カードのHTML断片キャッシュ（全セッション共通）。キーは app_id と表示内容から作るデータバージョン
+_CARD_HTML_CACHE = TTLCache(maxsize=config.CARD_HTML_CACHE_SIZE, ttl=60 * 60, name="card_html")
+
+
+def _card_version(game: GameRecord) -> int:
+    """カードの表示に使う項目のハッシュ（詳細データの取得などで表示が変わると変わる）"""
+    return hash((
+        game.title, game.link, game.image, game.price, game.date, game.review_count, game.attention_label,
+        game.is_coming_soon, game.is_jp_supported, game.has_demo, game.follower_count,
+    ))
+
+
+def _reveal_class(attention: str) -> str:
+    """レアリティ演出のクラス"""
+    if "伝説" in attention:
+        return "reveal-legendary"
+    if "那由多" in attention:
+        return "reveal-nayuta"
+    if "金" in attention:
+        return "reveal-gold"
+    if "太陽" in attention:
+        return "reveal-sun"
+    return ""
+
+
+def _glow_class(attention: str) -> str:
+    """レアリティに応じたバッジのglowクラス"""
+    if "伝説" in attention or "那由多" in attention:
+        return "glow-legendary"
+    if "金" in attention or "太陽" in attention:
+        return "glow-gold"
+    if "隠れた名作" in attention:
+        return "gem-badge"
+    if "新芽" in attention:
+        return "sprout-badge"
+    if "銀" in attention or "月" in attention:
+        return "glow-silver"
+    return ""
+
+
+def _build_card_html(game: GameRecord, eager: bool) -> str:
+    """
+    1枚分のカードのHTML（画像・タイトル・バッジ・日付と価格・レビュー数・Steamへのリンク）
+
+    st.markdown のHTMLブロックとして扱われるよう、空行とインデントを含めない。
+    """
+    # 画像（XSS対策: URLをエスケープ）。最初の4枚は優先読み込み、それ以降は遅延読み込み
+    img_url = html.escape(game.image or "https://via.placeholder.com/460x215?text=No+Image")
+    attention = game.attention_label
+    reveal_class = _reveal_class(attention)
+    loading_attrs = 'loading="eager" fetchpriority="high"' if eager else 'loading="lazy"'
+    parts = [
+        '<div class="game-card">',
+        f'<img src="{img_url}" class="preview-image {reveal_class}" decoding="async" {loading_attrs}>',
         # タイトル（2行制限、XSS対策: エスケープ）
-        safe_title = html.escape(game.get("title", ""))
-        title_html = f'<div class="game-title">{safe_title}</div>'
-        st.markdown(title_html, unsafe_allow_html=True)
-        
-        # バッジ行
-        badges_html = '<div class="badge-row">'
-        if game.get("is_jp_supported"):
-            badges_html += '<span class="jp-badge">🗾 日本語あり</span>'
-        
-        attention = game.get("attention_label", "")
-        if attention:
-            badge_icon_html = get_badge_icon(attention)
-            
-            # レアリティに応じたglowクラスを決定
-            glow_class = ""
-            if "伝説" in attention or "那由多" in attention:
-                glow_class = "glow-legendary"
-            elif "金" in attention or "太陽" in attention:
-                glow_class = "glow-gold"
-            elif "隠れた名作" in attention:
-                glow_class = "gem-badge"
-            elif "新芽" in attention:
-                glow_class = "sprout-badge"
-            elif "銀" in attention or "月" in attention:
-                glow_class = "glow-silver"
-            
-            # アイコンとテキストを表示（背景色＋エフェクト付き）
-            if badge_icon_html:
-                badges_html += f'<span class="attention-badge {glow_class}">{badge_icon_html}{attention}</span>'
-            else:
-                badges_html += f'<span class="attention-badge {glow_class}">{attention}</span>'
-        badges_html += '</div>'
-        st.markdown(badges_html, unsafe_allow_html=True)
-        
-        # 日付と価格/体験版を横並びで表示（左寄せ・GAP指定でレスポンシブ対応）
-        # 日付を短縮形式（YYYY/MM/DD）に変換してスペースを節約
-        date_str = game['date'].replace("年", "/").replace("月", "/").replace("日", "").rstrip("/")
-        
-        # Coming Soonの場合は体験版の有無、それ以外は価格を表示
-        if game.get("is_coming_soon"):
-            if game.get("has_demo"):
-                second_col = '<span style="color: #4CAF50; font-size: 0.9em; white-space: nowrap;">🎮 体験版あり</span>'
-            else:
-                second_col = '<span style="color: #888; font-size: 0.9em; white-space: nowrap;">🎮 体験版なし</span>'
-        else:
-            second_col = f'<span style="color: #FFD700; font-size: 0.9em; white-space: nowrap;">💰 {game["price"]}</span>'
-        
-        date_price_html = f'''
-        <div style="display: flex; align-items: center; gap: 12px; margin-bottom: 8px; flex-wrap: wrap;">
-            <span style="font-size: 0.9em; color: #ccc; white-space: nowrap;">📅 {date_str}</span>
-            {second_col}
-        </div>
-        '''
-        st.markdown(date_price_html, unsafe_allow_html=True)
-        
-        # レビューまたはフォロワー数
-        follower_count = game.get("follower_count")
-        if follower_count is not None:
-            # Coming Soon: フォロワー数を表示
-            st.caption(f"👥 フォロワー: {follower_count}")
-        elif game["review_count"] == 0:
-            st.caption("📜 日本語のレビュー数: 0")
+        f'<div class="game-title">{html.escape(game.title)}</div>',
+        '<div class="badge-row">',
+    ]
+
+    if game.is_jp_supported:
+        parts.append('<span class="jp-badge">🗾 日本語あり</span>')
+    if attention:
+        parts.append(f'<span class="attention-badge {_glow_class(attention)}">{get_badge_icon(attention)}{attention}</span>')
+    parts.append('</div>')
+
+    # 日付は短縮形式（YYYY/MM/DD）、Coming Soonの場合は体験版の有無、それ以外は価格を表示
+    date_str = game.date.replace("年", "/").replace("月", "/").replace("日", "").rstrip("/")
+    if game.is_coming_soon:
+        if game.has_demo:
+            second_col = '<span style="color: #4CAF50; font-size: 0.9em; white-space: nowrap;">🎮 体験版あり</span>'
         else:
-            st.caption(f"📜 日本語のレビュー数: {game['review_count']}")
-        
-        # 価格（上に移動したため削除）
-        
-        # 秘宝の詳細（エクスパンダー）
-        video_url = game.get("video_url")
-        screenshots = game.get("screenshots", [])
-        description = game.get("description", "")
-        
-        if video_url or screenshots or description:
-            with st.expander("詳細を見る"):
-                if description:
-                    # XSS対策: 説明文をエスケープ
-                    safe_description = html.escape(description)
-                    st.markdown(f"_{safe_description}_")
-                
-                if video_url:
-                    if ".m3u8" in video_url:
-                        # HLS形式: クライアントサイドで動的に読み込む（リロードなし）
-                        # JavaScriptでボタンクリック時にプレイヤーを生成
-                        video_component_html = f'''
-                        <style>
-                            html,body{{margin:0;padding:0;width:100%;height:100%;overflow:hidden;background:transparent}}
-                            #player-container{{width:100%;height:100%;display:flex;align-items:center;justify-content:center}}
-                            #load-btn{{
-                                background: linear-gradient(135deg, #3a3a5c 0%, #2a2a3c 100%);
-                                border: 1px solid #5a5a7a;
-                                color: #fff;
-                                padding: 12px 24px;
-                                border-radius: 8px;
-                                cursor: pointer;
-                                font-size: 14px;
-                                transition: all 0.2s;
-                            }}
-                            #load-btn:hover{{background: linear-gradient(135deg, #4a4a6c 0%, #3a3a4c 100%);}}
-                            video{{max-width:100%;max-height:100%;width:auto;height:auto;object-fit:contain;border-radius:8px;outline:none}}
-                        </style>
-                        <div id="player-container">
-                            <button id="load-btn" onclick="loadVideo()">📺 動画を読み込む</button>
-                        </div>
-                        <script src="https://cdn.jsdelivr.net/npm/hls.js@latest"></script>
-                        <script>
-                            function loadVideo() {{
-                                var container = document.getElementById('player-container');
-                                container.innerHTML = '<video id="hls-video" controls autoplay></video>';
-                                var video = document.getElementById('hls-video');
-                                if (Hls.isSupported()) {{
-                                    var hls = new Hls();
-                                    hls.loadSource('{video_url}');
-                                    hls.attachMedia(video);
-                                }} else if (video.canPlayType('application/vnd.apple.mpegurl')) {{
-                                    video.src = '{video_url}';
-                                }}
-                            }}
-                        </script>
-                        '''
-                        st.components.v1.html(video_component_html, height=225)
-                    else:
-                        st.video(video_url)
-                
-                if screenshots:
-                    # スクリーンショットを2列で表示（遅延読み込み）
-                    ss_cols = st.columns(2)
-                    for i, ss_url in enumerate(screenshots[:4]):
-                        if ss_url:
-                            # XSS対策: URLをエスケープ
-                            safe_ss_url = html.escape(ss_url)
-                            # loading="lazy" でネイティブ遅延読み込み
-                            ss_cols[i % 2].markdown(
-                                f'<img src="{safe_ss_url}" loading="lazy" style="width:100%; border-radius:4px;">',
-                                unsafe_allow_html=True
-                            )
-        
-        # 入手ボタン
-        btn_type = "primary" if game.get("is_jp_supported") else "secondary"
-        st.link_button("🛒 Steamで開く", game["link"], use_container_width=True, type=btn_type)
+            second_col = '<span style="color: #888; font-size: 0.9em; white-space: nowrap;">🎮 体験版なし</span>'
+    else:
+        second_col = f'<span style="color: #FFD700; font-size: 0.9em; white-space: nowrap;">💰 {html.escape(game.price)}</span>'
+    parts.append(
+        '<div style="display: flex; align-items: center; gap: 12px; margin-bottom: 8px; flex-wrap: wrap;">'
+        f'<span style="font-size: 0.9em; color: #ccc; white-space: nowrap;">📅 {html.escape(date_str)}</span>'
+        f'{second_col}</div>'
+    )
+
+    # レビューまたはフォロワー数（Coming Soon）
+    if game.follower_count is not None:
+        caption = f"👥 フォロワー: {game.follower_count}"
+    else:
+        caption = f"📜 日本語のレビュー数: {game.review_count}"
+    parts.append(f'<div class="card-caption">{caption}</div>')
+
+    # 入手リンク（日本語対応は強調表示）
+    link_class = "steam-link primary" if game.is_jp_supported else "steam-link"
+    parts.append(
+        f'<a class="{link_class}" href="{html.escape(game.link)}" target="_blank" rel="noopener">🛒 Steamで開く</a>'
+    )
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def card_html(game: GameRecord, idx: int) -> str:
+    """カードのHTML（断片キャッシュから。表示内容が変わったカードだけ作り直す）"""
+    eager = idx < 4
+    key = (game.app_id, _card_version(game), eager)
+    fragment = _CARD_HTML_CACHE.get(key)
+    if fragment is None:
+        fragment = _build_card_html(game, eager)
+        _CARD_HTML_CACHE.set(key, fragment)
+    return fragment
+
+
+@timed("render_game_card")
+def render_game_card(game: GameRecord, col, idx: int):
+    """ゲームカードを1枚だけ描画（取得できたカードから順に表示するとき用。1要素で描画）"""
+    col.markdown(card_html(game, idx), unsafe_allow_html=True)
+
+
+@timed("render_game_grid")
+def render_game_grid(games: list):
+    """
+    全カードのグリッドを1つの要素で描画
+
+    カードごとに要素を分けると再実行のたびに要素数分の差分がブラウザに送られるため、
+    HTMLをまとめて1回で送る。詳細の表示など操作が必要な部分は render_details_picker で描画する。
+    """
+    st.markdown(
+        '<div class="card-grid">' + "".join(card_html(game, i) for i, game in enumerate(games)) + '</div>',
+        unsafe_allow_html=True,
+    )
+
+
+def _has_details(game: GameRecord) -> bool:
+    return bool(game.video_url or game.screenshots or game.description)
+
+
+def render_details_picker(games: list):
+    """カードを1枚選んで詳細（説明文・動画・スクリーンショット）を表示。遅延モードではここで取得する"""
+    games_by_id = {game.app_id: game for game in games if game.lazy_details or _has_details(game)}
+    if not games_by_id:
+        return
+    picked = st.selectbox(
+        "🔍 詳細を見る",
+        list(games_by_id),
+        index=None,
+        format_func=lambda app_id: games_by_id[app_id].title,
+        placeholder="カードを選ぶと動画やスクリーンショットを表示します",
+        key="details_pick",
+    )
+    if picked is None:
+        return
+    game = games_by_id[picked]
+    if game.lazy_details:
+        with st.spinner("詳細を取得中..."):
+            load_details(game)
+    if _has_details(game):
+        _render_details(game.video_url, game.screenshots, game.description)
+    else:
+        st.caption("詳細を取得できませんでした")
 
 
-def render_magic_logo(logo_b64=None):
-    """魔法エフェクト付きのロゴを表示"""
+def render_magic_logo(logo_url=None):
+    """魔法エフェクト付きのロゴを表示（logo_url: 静的ファイルURLまたは data URI）"""
     # 20個の静的パーティクル（CSSで位置・アニメーション定義済み）
     particles = ''.join(['<div class="magic-particle"></div>' for _ in range(20)])
     
-    if logo_b64:
-        logo_html = f'<img src="data:image/png;base64,{logo_b64}" width="600">'
+    if logo_url:
+        logo_html = f'<img src="{html.escape(logo_url)}" width="600">'
     else:
         logo_html = f'<h1>{get_icon_html("sword", 40)} Steam Arcana</h1>'
     
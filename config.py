@@ -0,0 +1,119 @@
+"""
+アプリ設定
+- 環境変数で上書き可能な定数をまとめる
+"""
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """環境変数を整数として読み込む（不正値はデフォルト）"""
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 永続キャッシュ（SQLite）の保存先
+CACHE_PATH = os.environ.get(
+    "STEAM_ARCANA_CACHE_PATH",
+    os.path.join(".cache", "steam_arcana.sqlite3"),
+)
+
+# キャッシュの有効期限（秒）
+APP_DETAILS_TTL = _env_int("STEAM_ARCANA_APP_DETAILS_TTL", 24 * 60 * 60)
+REVIEWS_SUMMARY_TTL = _env_int("STEAM_ARCANA_REVIEWS_SUMMARY_TTL", 6 * 60 * 60)
+FOLLOWER_COUNT_TTL = _env_int("STEAM_ARCANA_FOLLOWER_COUNT_TTL", 6 * 60 * 60)
+# 失効後もこの期間内なら古い値を即座に返し、バックグラウンドで再取得する（stale-while-revalidate。0 で無効）
+APP_DETAILS_MAX_STALENESS = _env_int("STEAM_ARCANA_APP_DETAILS_MAX_STALENESS", 7 * 24 * 60 * 60)
+FOLLOWER_COUNT_MAX_STALENESS = _env_int("STEAM_ARCANA_FOLLOWER_COUNT_MAX_STALENESS", 2 * 24 * 60 * 60)
+CACHE_REFRESH_WORKERS = _env_int("STEAM_ARCANA_CACHE_REFRESH_WORKERS", 2)
+# 上流が「存在しない」と返した結果（appdetails の success: false など）の保存期間
+NEGATIVE_TTL = _env_int("STEAM_ARCANA_NEGATIVE_TTL", 60 * 60)
+# タイムアウト・429・5xx など一時的な失敗の保存期間（障害中に全セッションから再試行が殺到しないよう短時間だけ。0 で保存しない）
+TRANSIENT_ERROR_TTL = _env_int("STEAM_ARCANA_TRANSIENT_ERROR_TTL", 30)
+# 失効したエントリの削除: プロセスで最初に開いたときと、この回数の書き込みごとに行う
+# （stale-while-revalidate の名前空間は、失効後も最大許容期間が過ぎるまで残す）
+CACHE_PURGE_EVERY = _env_int("STEAM_ARCANA_CACHE_PURGE_EVERY", 1000)
+
+# HTTP クライアント
+HTTP_POOL_SIZE = _env_int("STEAM_ARCANA_HTTP_POOL_SIZE", 16)  # ホストごとの最大接続数
+HTTP_CONNECT_TIMEOUT = _env_int("STEAM_ARCANA_HTTP_CONNECT_TIMEOUT", 5)
+HTTP_READ_TIMEOUT = _env_int("STEAM_ARCANA_HTTP_READ_TIMEOUT", 10)
+HTTP_MAX_RETRIES = _env_int("STEAM_ARCANA_HTTP_MAX_RETRIES", 3)
+
+# 詳細データ取得の同時実行数（上流ホストごとの既定値。HTTP接続プールの大きさまで並行する）
+ENRICH_CONCURRENCY = _env_int("STEAM_ARCANA_ENRICH_CONCURRENCY", HTTP_POOL_SIZE)
+
+# 上流ホストごとの同時接続上限（全セッション共通。1秒あたりのリクエスト数は下のレート制限で抑える）
+STORE_CONCURRENCY = _env_int("STEAM_ARCANA_STORE_CONCURRENCY", ENRICH_CONCURRENCY)
+POPULARITY_CONCURRENCY = _env_int("STEAM_ARCANA_POPULARITY_CONCURRENCY", ENRICH_CONCURRENCY)
+
+# 古代モードの並列探索
+TREASURE_SCAN_CONCURRENCY = _env_int("STEAM_ARCANA_TREASURE_SCAN_CONCURRENCY", 4)
+SEARCH_RATE_PER_SEC = _env_int("STEAM_ARCANA_SEARCH_RATE_PER_SEC", 3)  # 検索ページの取得レート
+SEARCH_RATE_BURST = _env_int("STEAM_ARCANA_SEARCH_RATE_BURST", 4)
+
+# 大きな画像の配信方法
+# auto: Streamlitの静的ファイル配信が有効ならURL参照、無効ならbase64埋め込み
+# static / inline: 強制
+STATIC_ASSET_MODE = os.environ.get("STEAM_ARCANA_STATIC_ASSET_MODE", "auto")
+
+# 検索結果キャッシュ（同一クエリの結果を全セッションで共有）
+SEARCH_CACHE_TTL = _env_int("STEAM_ARCANA_SEARCH_CACHE_TTL", 120)
+SEARCH_CACHE_SIZE = _env_int("STEAM_ARCANA_SEARCH_CACHE_SIZE", 256)
+
+# セッションごとの検索結果（session_store.py）
+# 全セッション合計の推定バイト数がこの上限を超えたら、最も長く操作のないセッションの結果をディスクに退避する
+SESSION_RESULTS_BUDGET = _env_int("STEAM_ARCANA_SESSION_RESULTS_BUDGET", 64 * 1024 * 1024)
+# 退避した結果の保存期間（秒）
+SESSION_RESULTS_SPILL_TTL = _env_int("STEAM_ARCANA_SESSION_RESULTS_SPILL_TTL", 24 * 60 * 60)
+
+# ローカルカタログ（Steam検索結果のミラー）
+# auto: カタログがあれば最新・古代の検索に使う / off: 常にSteamへ問い合わせる
+CATALOG_DIR = os.environ.get("STEAM_ARCANA_CATALOG_DIR", os.path.join(".cache", "catalog"))
+CATALOG_MODE = os.environ.get("STEAM_ARCANA_CATALOG_MODE", "auto")
+# 最新モードに使うカタログの鮮度（秒）。巡回の完了からこれ以上経っていたらSteamの検索を使う（0 で無制限）
+CATALOG_MAX_AGE = _env_int("STEAM_ARCANA_CATALOG_MAX_AGE", 6 * 60 * 60)
+# 差分更新のたびに既知の行も含めて末尾まで巡回し直すタグ数（最も長く巡回し直していないタグから順に）
+CATALOG_REFRESH_TAGS = _env_int("STEAM_ARCANA_CATALOG_REFRESH_TAGS", 4)
+
+# 詳細データ取得が1件終わるごとにカードを表示する（0 で全件取得後にまとめて表示）
+STREAM_RENDER = _env_int("STEAM_ARCANA_STREAM_RENDER", 1)
+
+# カードのHTML断片のキャッシュ件数（全セッション共通）
+CARD_HTML_CACHE_SIZE = _env_int("STEAM_ARCANA_CARD_HTML_CACHE_SIZE", 2048)
+
+# 最新/古代モード（日本語フィルター有効時）は詳細データをカードを開いたときに取得する（0 で全件を先に取得）
+LAZY_ENRICH = _env_int("STEAM_ARCANA_LAZY_ENRICH", 1)
+
+# 「もっと見る」用に次ページを先読みするワーカー数
+PREFETCH_WORKERS = _env_int("STEAM_ARCANA_PREFETCH_WORKERS", 2)
+
+# レビュー概要（appreviews）から注目度ラベルを算出する（0 で検索結果のツールチップから判定）
+REVIEW_LABELS = _env_int("STEAM_ARCANA_REVIEW_LABELS", 1)
+REVIEWS_RATE_PER_SEC = _env_int("STEAM_ARCANA_REVIEWS_RATE_PER_SEC", 10)
+REVIEWS_RATE_BURST = _env_int("STEAM_ARCANA_REVIEWS_RATE_BURST", 50)  # 1ページ分は待たずに取得
+
+# 上流リクエストの期限（秒）。期限を過ぎたジョブは実行せずに破棄する（scheduler.py）
+INTERACTIVE_DEADLINE = _env_int("STEAM_ARCANA_INTERACTIVE_DEADLINE", 30)
+PREFETCH_DEADLINE = _env_int("STEAM_ARCANA_PREFETCH_DEADLINE", 60)
+SCAN_DEADLINE = _env_int("STEAM_ARCANA_SCAN_DEADLINE", 20)
+
+# 上流ホストごとの共有レート制限（全プロセス合計。1秒あたりの回数 / 連続で即時実行できる回数）
+STORE_RATE_PER_SEC = _env_int("STEAM_ARCANA_STORE_RATE_PER_SEC", 20)
+STORE_RATE_BURST = _env_int("STEAM_ARCANA_STORE_RATE_BURST", 40)
+POPULARITY_RATE_PER_SEC = _env_int("STEAM_ARCANA_POPULARITY_RATE_PER_SEC", 10)
+POPULARITY_RATE_BURST = _env_int("STEAM_ARCANA_POPULARITY_RATE_BURST", 20)
+RATE_LIMIT_MAX_WAIT = _env_int("STEAM_ARCANA_RATE_LIMIT_MAX_WAIT", 10)  # これ以上待つ場合は失敗扱い
+
+# サーキットブレーカー（429 / 5xx / 接続エラーが連続したらホストへの呼び出しを一時停止）
+CIRCUIT_FAILURE_THRESHOLD = _env_int("STEAM_ARCANA_CIRCUIT_FAILURE_THRESHOLD", 5)
+CIRCUIT_OPEN_SECONDS = _env_int("STEAM_ARCANA_CIRCUIT_OPEN_SECONDS", 30)
+
+# 上流ホストの差し替え（ベンチマーク用。例: "store.steampowered.com=http://127.0.0.1:8765"）
+UPSTREAM_OVERRIDES = os.environ.get("STEAM_ARCANA_UPSTREAM_OVERRIDES", "")
+
+# メトリクス（Prometheus テキスト形式の /metrics を返すローカルエンドポイント。0 で無効）
+METRICS_PORT = _env_int("STEAM_ARCANA_METRICS_PORT", 0)
+METRICS_HOST = os.environ.get("STEAM_ARCANA_METRICS_HOST", "127.0.0.1")
@@ -0,0 +1,229 @@
+"""
+詳細データ取得（エンリッチ）エンジン
+- 全件の問い合わせを上流ホストごとのスケジューラー（scheduler.py）に並べて並行取得し、優先度と期限に従って全セッションで公平に実行
+- Streamlit のスクリプトスレッドから呼び出し、1件完了ごとに進捗を通知
+- 遅延モードでは検索結果だけで表示し、詳細はカードを開いたときに1件ずつ取得
+"""
+
+import re
+from concurrent.futures import Future, as_completed
+
+import config
+from metrics import timed
+from records import GameRecord
+from scheduler import HOST_SCHEDULERS, POPULARITY_HOST, STORE_HOST, JobDropped
+from steam_api import (
+    get_app_details, extract_preview_urls, calc_attention_label, calc_expectation_label, get_follower_count,
+    get_app_reviews_summary, schedule_app_reviews_summaries, calc_review_score_desc, submit_app_details_many,
+)
+
+def apply_review_summary(game: GameRecord, reviews_summary: dict) -> GameRecord:
+    """
+    レビュー概要の好評・不評件数から評価と注目度ラベルを算出し直す（取得失敗時は検索結果の値のまま）
+
+    一時的な失敗（"transient"）は取得待ちのまま残し、キャッシュが切れた後に取得し直す。
+    """
+    if reviews_summary is not None:
+        game.reviews_pending = bool(reviews_summary.get("transient"))
+    if reviews_summary and reviews_summary.get("success"):
+        total_positive = reviews_summary.get("total_positive", 0)
+        total_negative = reviews_summary.get("total_negative", 0)
+        if total_positive + total_negative > 0:
+            game.review_desc = calc_review_score_desc(total_positive, total_negative)
+            game.attention_label = calc_attention_label(total_positive + total_negative, game.review_desc)
+    return game
+
+
+def request_review_summaries(games: list) -> list:
+    """
+    リリース済みのゲームのレビュー概要を、キャッシュ済みならその場で反映し、未取得ならバックグラウンドで取得（待たない）
+
+    取得待ちのゲームは検索結果のツールチップから判定したラベルのまま表示し、
+    取得後の再実行で apply_cached_review_summaries により反映する。
+    """
+    if not config.REVIEW_LABELS:
+        return games
+    pending_ids = []
+    for game in games:
+        if game.is_coming_soon:
+            continue
+        reviews_summary = get_app_reviews_summary.peek(game.app_id)
+        if reviews_summary is None:
+            game.reviews_pending = True
+            pending_ids.append(game.app_id)
+        else:
+            apply_review_summary(game, reviews_summary)
+    schedule_app_reviews_summaries(pending_ids)
+    return games
+
+
+def apply_cached_review_summaries(games: list) -> list:
+    """
+    取得待ちのレビュー概要のうち、キャッシュに入ったものを反映（その場では上流に問い合わせない）
+
+    キャッシュにないもの（一時的な失敗の期限切れなど）はバックグラウンドで取得し直す。
+    取得中のものは submit_shared で共有されるため、再実行のたびに二重に取得することはない。
+    """
+    retry_ids = []
+    for game in games:
+        if game.reviews_pending:
+            reviews_summary = get_app_reviews_summary.peek(game.app_id)
+            if reviews_summary is None:
+                retry_ids.append(game.app_id)
+            else:
+                apply_review_summary(game, reviews_summary)
+    if retry_ids:
+        schedule_app_reviews_summaries(retry_ids)
+    return games
+
+
+def _wants_reviews(game: GameRecord) -> bool:
+    return bool(config.REVIEW_LABELS) and not game.is_coming_soon
+
+
+def apply_enrichment(game: GameRecord, steam_data: dict, follower_count: int = None,
+                     reviews_summary: dict = None) -> GameRecord:
+    """取得済みのAPIデータをゲーム情報に反映"""
+    if steam_data.get("success"):
+        game.is_jp_supported = steam_data.get("is_japanese_supported", False)
+        game.description = steam_data.get("short_description", "")
+
+        preview = extract_preview_urls(steam_data)
+        game.video_url = preview.get("video_url")
+        game.screenshots = tuple(preview.get("screenshots", ()))
+    else:
+        game.is_jp_supported = bool(re.search(r'[ぁ-んァ-ン]', game.title))
+        game.description = ""
+        game.video_url = None
+        game.screenshots = ()
+
+    # Coming Soonの場合は期待度ラベル、それ以外は注目度ラベル
+    if game.is_coming_soon:
+        game.follower_count = follower_count or 0
+        game.attention_label = calc_expectation_label(game.follower_count)
+        # 体験版の有無を追加
+        game.has_demo = bool(steam_data.get("success")) and len(steam_data.get("demos", [])) > 0
+    else:
+        game.attention_label = calc_attention_label(game.review_count, game.review_desc)
+        apply_review_summary(game, reviews_summary)
+
+    return game
+
+
+def enrich_game_data(game: GameRecord) -> GameRecord:
+    """APIからゲームの詳細データを取得して追加（同期版）"""
+    app_id = game.app_id
+    if not app_id:
+        return game
+
+    steam_data = get_app_details(app_id)
+    # Games-Popularity.com APIからフォロワー数を取得
+    follower_count = get_follower_count(app_id) if game.is_coming_soon else None
+    reviews_summary = get_app_reviews_summary(app_id) if _wants_reviews(game) else None
+    return apply_enrichment(game, steam_data, follower_count, reviews_summary)
+
+
+def mark_lazy(games: list, only_japanese: bool) -> list:
+    """
+    詳細データを取得せずに表示できるよう、検索結果の情報だけでカードの項目を埋める
+
+    最新/古代モードで日本語フィルター（supportedlang=japanese）付きの検索なら、日本語対応は確定している。
+    詳細（説明文・動画・スクリーンショット）はカードの「詳細を見る」を開いたときに load_details で取得する。
+    注目度ラベルに使うレビュー概要は、キャッシュ済みの分だけ反映し、残りはバックグラウンドで取得する（最初の表示を待たせない）。
+    """
+    for game in games:
+        game.lazy_details = True
+        game.details_loaded = False
+        game.is_jp_supported = only_japanese or bool(re.search(r'[ぁ-んァ-ン]', game.title))
+    return request_review_summaries(games)
+
+
+def load_details(game: GameRecord) -> GameRecord:
+    """遅延モードのカードの詳細データを取得（取得済みなら何もしない）"""
+    if game.details_loaded:
+        return game
+    jp_supported = game.is_jp_supported
+    enrich_game_data(game)
+    # 検索フィルターで保証された日本語対応は詳細データの取得失敗で打ち消さない
+    game.is_jp_supported = game.is_jp_supported or jp_supported
+    game.details_loaded = True
+    return game
+
+
+def _submit(host: str, func, *args) -> Future:
+    """
+    ホストのスケジューラーにブロッキング呼び出しを並べる（優先度・期限は呼び出し元の request_context に従う）
+
+    他のセッション・先読みが同じ呼び出しを並べていればその Future を共有する。
+    """
+    return HOST_SCHEDULERS[host].submit_shared(func, *args)
+
+
+def _submit_game(game: GameRecord, details_futures: dict) -> dict:
+    """
+    1件分の問い合わせを並べて {apply_enrichment の引数名: Future} を返す（Coming Soonはフォロワー数、リリース済みはレビュー概要も）
+
+    details_futures: submit_app_details_many で並べたゲーム詳細の Future（同じAppIDのゲームで共有する）
+    """
+    futures = {"steam_data": details_futures[game.app_id]}
+    if game.is_coming_soon:
+        futures["follower_count"] = _submit(POPULARITY_HOST, get_follower_count, game.app_id)
+    elif _wants_reviews(game):
+        futures["reviews_summary"] = _submit(STORE_HOST, get_app_reviews_summary, game.app_id)
+    return futures
+
+
+def _apply_futures(game: GameRecord, futures: dict) -> GameRecord:
+    """完了した問い合わせの結果を反映"""
+    try:
+        values = {name: future.result() for name, future in futures.items()}
+    except JobDropped:
+        # 期限切れ・セッション終了で取得しなかった（この結果は検索結果キャッシュに保存しない）
+        game.enrich_incomplete = True
+        return apply_enrichment(game, {"success": False, "transient": True})
+    return apply_enrichment(game, **values)
+
+
+@timed("enrich_all")
+def enrich_all(games: list, on_progress=None, on_result=None) -> list:
+    """
+    全件の詳細データを並行取得（Streamlitのスクリプトスレッドから呼ぶ）
+
+    全件の問い合わせを先にホストごとのスケジューラーへ並べ、1件分が揃った順に反映する。
+    同時に実行される数はスケジューラーのワーカー数（ホストごとの同時接続上限）で決まる。
+    コールバックは呼び出し元スレッドで実行されるため、中で st の要素を更新してよい。
+
+    on_progress: 1件完了ごとに (完了数, 総数) で呼ばれるコールバック
+    on_result: 1件完了ごとに (入力での位置, 取得済みのゲーム) で呼ばれるコールバック（完了順）
+    Returns:
+        入力と同じ順序のゲームリスト
+    """
+    if not games:
+        return []
+    # 同じAppIDが複数回含まれていても、ゲーム詳細は1回だけ問い合わせる
+    details_futures = submit_app_details_many(game.app_id for game in games)
+    submitted = [_submit_game(game, details_futures) if game.app_id else {} for game in games]
+    remaining = [len(futures) for futures in submitted]
+    owners = {}  # Future → それを待つゲームの位置
+    for idx, futures in enumerate(submitted):
+        for future in futures.values():
+            owners.setdefault(future, []).append(idx)
+
+    def completed_indexes():
+        # 問い合わせのないゲームはすぐに完了、それ以外は全項目が揃った順
+        yield from (idx for idx, futures in enumerate(submitted) if not futures)
+        for future in as_completed(owners):
+            for idx in owners[future]:
+                remaining[idx] -= 1
+                if remaining[idx] == 0:
+                    yield idx
+
+    results = list(games)
+    for completed_count, idx in enumerate(completed_indexes(), start=1):
+        if submitted[idx]:
+            results[idx] = _apply_futures(games[idx], submitted[idx])
+        if on_result:
+            on_result(idx, results[idx])
+        if on_progress:
+            on_progress(completed_count, len(games))
+    return results
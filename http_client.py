@@ -0,0 +1,168 @@
+"""
+共有HTTPクライアント
+- 全上流呼び出しで1つのSessionを共有（Keep-Alive・ホストごとのコネクションプール）
+- gzip / brotli（brotli導入時）対応
+- 429 / 5xx に対するジッター付き指数バックオフ再試行
+- 上流ホストの差し替え（ベンチマーク用スタブサーバーへの向け先変更）
+- ホストごとの所要時間・エラー数をメトリクスに記録
+- ホストごとの共有レート制限とサーキットブレーカー（全プロセス共通）
+"""
+
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+import config
+from circuit_breaker import CircuitBreaker
+from metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY
+from rate_limit import SharedRateLimiter
+
+# 全リクエスト共通のタイムアウト（接続, 読み込み）
+DEFAULT_TIMEOUT = (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _build_session() -> requests.Session:
+    """コネクションプールと再試行設定済みのSessionを作成"""
+    retry = Retry(
+        total=config.HTTP_MAX_RETRIES,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        backoff_max=10,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # 最終試行のレスポンスをそのまま返す
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,  # 接続先ホスト数
+        pool_maxsize=config.HTTP_POOL_SIZE,
+        pool_block=False,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    # brotli / brotlicffi が入っていれば "br" も含まれる
+    session.headers.update(make_headers(accept_encoding=True, keep_alive=True))
+    return session
+
+
+SESSION = _build_session()
+
+
+class UpstreamUnavailable(requests.RequestException):
+    """レート制限の待ち時間超過、またはサーキットブレーカーで停止中のホストへの呼び出し"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"{host} への接続を一時停止中です（あと{int(retry_after) + 1}秒）")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class HostGuard:
+    """上流ホスト1つ分のレート制限とサーキットブレーカー"""
+
+    def __init__(self, host: str, rate: float, burst: int):
+        self.host = host
+        self.limiter = SharedRateLimiter(host, rate, burst)
+        self.breaker = CircuitBreaker(host, config.CIRCUIT_FAILURE_THRESHOLD, config.CIRCUIT_OPEN_SECONDS)
+
+    def before_request(self):
+        # 停止中ならトークンを消費せずに断る
+        retry_after = self.breaker.retry_after()
+        if retry_after > 0:
+            raise UpstreamUnavailable(self.host, retry_after)
+        if not self.limiter.acquire(max_wait=config.RATE_LIMIT_MAX_WAIT):
+            raise UpstreamUnavailable(self.host, self.limiter.wait_time())
+        # half-open では試行の1件だけを通す
+        retry_after = self.breaker.allow_request()
+        if retry_after > 0:
+            raise UpstreamUnavailable(self.host, retry_after)
+
+
+HOST_GUARDS = {
+    "store.steampowered.com": HostGuard(
+        "store.steampowered.com", config.STORE_RATE_PER_SEC, config.STORE_RATE_BURST
+    ),
+    "games-popularity.com": HostGuard(
+        "games-popularity.com", config.POPULARITY_RATE_PER_SEC, config.POPULARITY_RATE_BURST
+    ),
+}
+
+
+def retry_after(host: str) -> float:
+    """ホストがサーキットブレーカーで停止中なら再開までの秒数（呼び出してよければ 0.0）"""
+    guard = HOST_GUARDS.get(host)
+    return guard.breaker.retry_after() if guard is not None else 0.0
+
+
+def _parse_overrides(spec: str) -> dict:
+    """「host=http://127.0.0.1:8765,host2=...」形式の指定を {host: (scheme, netloc)} に変換"""
+    overrides = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, base_url = item.partition("=")
+        target = urlsplit(base_url)
+        overrides[host.strip()] = (target.scheme, target.netloc)
+    return overrides
+
+
+# 上流ホストの向け先（通常は空。STEAM_ARCANA_UPSTREAM_OVERRIDES で指定）
+UPSTREAM_OVERRIDES = _parse_overrides(config.UPSTREAM_OVERRIDES)
+
+
+def set_upstream_override(host: str, base_url: str):
+    """指定ホストへのリクエストを base_url（例: http://127.0.0.1:8765）に向ける"""
+    UPSTREAM_OVERRIDES.update(_parse_overrides(f"{host}={base_url}"))
+
+
+def _resolve_url(url: str) -> str:
+    if not UPSTREAM_OVERRIDES:
+        return url
+    parts = urlsplit(url)
+    override = UPSTREAM_OVERRIDES.get(parts.hostname)
+    if override is None:
+        return url
+    return urlunsplit((override[0], override[1], parts.path, parts.query, parts.fragment))
+
+
+def get(url: str, params: dict = None, headers: dict = None, timeout=DEFAULT_TIMEOUT) -> requests.Response:
+    """
+    共有Session経由でGETリクエストを送信
+
+    既知のホストはレート制限の範囲で送信し、停止中なら UpstreamUnavailable を送出する。
+    """
+    host = urlsplit(url).hostname
+    guard = HOST_GUARDS.get(host)
+    if guard is not None:
+        try:
+            guard.before_request()
+        except UpstreamUnavailable:
+            UPSTREAM_ERRORS.inc(host=host, reason="unavailable")
+            raise
+
+    start = time.perf_counter()
+    try:
+        res = SESSION.get(_resolve_url(url), params=params, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        UPSTREAM_ERRORS.inc(host=host, reason=type(e).__name__)
+        if guard is not None:
+            guard.breaker.record_failure()
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=host)
+
+    if res.status_code >= 400:
+        UPSTREAM_ERRORS.inc(host=host, reason=str(res.status_code))
+    if guard is not None:
+        if res.status_code == 429 or res.status_code >= 500:
+            guard.breaker.record_failure()
+        else:
+            guard.breaker.record_success()
+    return res
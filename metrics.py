@@ -0,0 +1,268 @@
+"""
+メトリクス
+- カウンター / ゲージ / ヒストグラム（ラベル付き）をプロセス内で集計（スレッドセーフ）
+- Prometheus テキスト形式で出力
+- ローカルHTTPエンドポイント（STEAM_ARCANA_METRICS_PORT 指定時）とデバッグパネル（?debug=1）で参照
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+# 秒単位のヒストグラム境界
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_METRICS = []
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """単調増加するカウンター"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge:
+    """現在値（増減する）"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> list:
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """累積バケット・合計・件数を持つヒストグラム"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label_key → [バケットごとの件数..., 合計, 件数]
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """with ブロックの所要時間を記録"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            items = [(key, list(entry)) for key, entry in sorted(self._values.items())]
+        result = []
+        for key, entry in items:
+            for i, bound in enumerate(self.buckets):
+                result.append((f"{self.name}_bucket", key + (("le", repr(bound)),), entry[i]))
+            result.append((f"{self.name}_bucket", key + (("le", "+Inf"),), entry[-1]))
+            result.append((f"{self.name}_sum", key, entry[-2]))
+            result.append((f"{self.name}_count", key, entry[-1]))
+        return result
+
+    def summary(self) -> list:
+        """デバッグパネル用: ラベルごとの件数・平均・バケットから推定した p95"""
+        with self._lock:
+            items = [(dict(key), list(entry)) for key, entry in sorted(self._values.items())]
+        rows = []
+        for labels, entry in items:
+            count = entry[-1]
+            p95 = None
+            for i, bound in enumerate(self.buckets):
+                if entry[i] >= count * 0.95:
+                    p95 = bound
+                    break
+            rows.append({
+                **labels,
+                "count": count,
+                "mean_ms": round(entry[-2] / count * 1000, 1) if count else 0,
+                "p95_ms(≤)": p95 * 1000 if p95 is not None else None,
+            })
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+# ------------------------------------------------------------
+# アプリ共通のメトリクス
+# ------------------------------------------------------------
+UPSTREAM_LATENCY = Histogram(
+    "steam_arcana_upstream_request_seconds", "上流APIへのリクエスト所要時間（再試行込み）"
+)
+UPSTREAM_ERRORS = Counter(
+    "steam_arcana_upstream_errors_total", "上流APIのエラー数（reason: HTTPステータスまたは例外名）"
+)
+STAGE_LATENCY = Histogram(
+    "steam_arcana_stage_seconds", "処理段階ごとの所要時間（検索・パース・API関数・描画）"
+)
+CACHE_REQUESTS = Counter(
+    "steam_arcana_cache_requests_total", "キャッシュ参照数（result: hit / stale（失効済みを返して再取得） / miss）"
+)
+FETCH_OUTCOMES = Counter(
+    "steam_arcana_fetch_outcomes_total", "キャッシュ対象の取得結果（outcome: ok / miss（恒久的な欠損） / error（一時的な失敗））"
+)
+CACHE_EVICTIONS = Counter(
+    "steam_arcana_cache_evictions_total", "キャッシュから破棄されたエントリ数（reason: expired / capacity）"
+)
+
+SESSION_RESULTS_BYTES = Gauge(
+    "steam_arcana_session_results_bytes", "メモリ上に保持しているセッションごとの検索結果の推定バイト数（全セッション合計）"
+)
+SESSION_RESULTS_SESSIONS = Gauge(
+    "steam_arcana_session_results_sessions", "検索結果をメモリ上に保持しているセッション数"
+)
+SESSION_RESULTS_EVENTS = Counter(
+    "steam_arcana_session_results_events_total",
+    "セッションの検索結果の移動（event: spilled（ディスクへ退避） / restored（読み戻し） / dropped（接続終了で破棄））",
+)
+
+
+def timed(stage: str):
+    """関数の所要時間を STAGE_LATENCY に記録するデコレータ"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with STAGE_LATENCY.time(stage=stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_text() -> str:
+    """全メトリクスを Prometheus テキスト形式で出力"""
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, label_key, value in metric.samples():
+            lines.append(f"{name}{_format_labels(label_key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """全メトリクスを初期化（ベンチマーク用）"""
+    for metric in _METRICS:
+        metric.clear()
+
+
+# ------------------------------------------------------------
+# ローカルエンドポイント
+# ------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_server(port: int = None, host: str = None):
+    """
+    /metrics を返すHTTPサーバーをバックグラウンドで起動（プロセスごとに1回だけ）
+
+    port が 0（既定）の場合は起動しない。Streamlit の再実行ごとに呼んでも安全。
+    """
+    global _server
+    port = config.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host or config.METRICS_HOST, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Metrics server error: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
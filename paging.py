@@ -0,0 +1,147 @@
+"""
+ページ送り（最新 / 未来の「もっと見る」）
+- 1ページ分の検索と詳細データ取得を、UIに依存しない1つの処理として実行
+- 表示中のページの次ページをバックグラウンドで先読みし、検索結果キャッシュに保存
+- 先読み中のページを要求された場合は対話の優先度で取得し直す。先読みが並べた同じ上流リクエストは
+  共有され、対話の優先度に引き上げられる（二重に取得しない）
+- 先読みの上流リクエスト（検索・詳細データ取得とも）はスケジューラーに低い優先度で並べ、
+  セッションが終了したら破棄される（scheduler.py）
+- 最新モードの情報源（ローカルカタログ / Steamの検索）は1ページ目で決めて以降のページでも変えない
+  （カタログは絞り込み後、検索は絞り込み前の位置でページを数えるため、途中で変えると取りこぼす）
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from catalog import get_catalog
+from enrichment import enrich_all, mark_lazy
+from result_cache import get_cached_page, get_cached_results, make_query_key, store_results
+from scheduler import HOST_SCHEDULERS, INTERACTIVE, PREFETCH, STORE_HOST, JobDropped, current_session_id, request_context
+from search import SEARCH_MODES, SearchError, fetch_search_page
+
+PAGE_SIZE = 50
+
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=config.PREFETCH_WORKERS, thread_name_prefix="prefetch")
+_IN_FLIGHT = {}  # クエリキー → Future
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def make_page_query(mode: str, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999,
+                    only_japanese=True, source: str = "search") -> dict:
+    """
+    ページ送りで引き継ぐ検索条件（session_state に保存する）
+
+    source: 結果の情報源（"search": Steamの検索 / "catalog": ローカルカタログ。1ページ目で決める）
+    """
+    return {
+        "mode": mode,
+        "tags": list(tags),
+        "exclude_tags": list(exclude_tags_list),
+        "min_reviews": min_reviews,
+        "max_reviews": max_reviews,
+        "only_japanese": only_japanese,
+        "source": source,
+    }
+
+
+def use_lazy_enrichment(mode: str, only_japanese: bool) -> bool:
+    """詳細データをカードを開いたときに取得するか（日本語フィルター付きのリリース済み検索のみ）"""
+    return bool(config.LAZY_ENRICH) and only_japanese and mode == "released"
+
+
+def page_key(query: dict, start_offset: int) -> tuple:
+    return make_query_key(
+        query["mode"], query["tags"], query["exclude_tags"], query["min_reviews"], query["max_reviews"],
+        query["only_japanese"], start_offset=start_offset, source=query.get("source", "search"),
+    )
+
+
+def _search_page(mode: str, query: dict, start_offset: int, min_reviews=0, max_reviews=9999999) -> tuple:
+    """
+    検索APIの1ページをストアのスケジューラー経由で取得（優先度・期限は呼び出し元の request_context に従う）
+
+    先読みの検索も対話の取得と同じ優先度付きキューに並ぶ。同じページの検索が並んでいればそれを共有する。
+    Raises:
+        SearchError: 取得できなかった（期限切れ・セッション終了で実行されなかった場合を含む）
+    """
+    future = HOST_SCHEDULERS[STORE_HOST].submit_shared(
+        fetch_search_page, mode, tuple(query["tags"]), tuple(query["exclude_tags"]),
+        min_reviews, max_reviews, start_offset, query["only_japanese"],
+    )
+    try:
+        return future.result()
+    except JobDropped as e:
+        raise SearchError(f"{SEARCH_MODES[mode]['error_label']}: {e}") from e
+
+
+def fetch_page(query: dict, start_offset: int) -> tuple:
+    """
+    1ページ分を検索して詳細データを付与（キャッシュは参照しない）
+
+    Returns:
+        (結果, 次のページがあるか)。次のページの有無は絞り込み前の上流の結果で判定する
+    Raises:
+        SearchError: 検索に失敗した（画面への表示は呼び出し元のスクリプトスレッドで行う）
+    """
+    if query["mode"] == "coming_soon":
+        results, has_more = _search_page("coming_soon", query, start_offset)
+    elif query.get("source") == "catalog":
+        # 1ページ目がカタログなら、途中で古くなってもカタログのまま続ける（鮮度は1ページ目で判定済み）
+        catalog = get_catalog()
+        if catalog is None:
+            return [], False
+        results, has_more = catalog.search_latest_page(
+            query["tags"], query["exclude_tags"], min_reviews=query["min_reviews"], max_reviews=query["max_reviews"],
+            start_offset=start_offset, only_japanese=query["only_japanese"],
+        )
+    else:
+        results, has_more = _search_page(
+            "released", query, start_offset, query["min_reviews"], query["max_reviews"]
+        )
+
+    if use_lazy_enrichment(query["mode"], query["only_japanese"]):
+        return mark_lazy(results, query["only_japanese"]), has_more
+    return enrich_all(results), has_more
+
+
+def _fetch_and_store(query: dict, start_offset: int, key: tuple, session_id) -> tuple:
+    try:
+        with request_context(PREFETCH, session_id=session_id):
+            results, has_more = fetch_page(query, start_offset)
+        store_results(key, results, has_more)
+        return results, has_more
+    finally:
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT.pop(key, None)
+
+
+def prefetch_page(query: dict, start_offset: int):
+    """次ページをバックグラウンドで取得して検索結果キャッシュに保存（取得済み・取得中なら何もしない）"""
+    key = page_key(query, start_offset)
+    if key in _IN_FLIGHT or get_cached_results(key) is not None:
+        return
+    with _IN_FLIGHT_LOCK:
+        if key not in _IN_FLIGHT:
+            _IN_FLIGHT[key] = _PREFETCH_EXECUTOR.submit(
+                _fetch_and_store, query, start_offset, key, current_session_id()
+            )
+
+
+def load_page(query: dict, start_offset: int) -> tuple:
+    """
+    1ページ分の (結果, 次のページがあるか) を返す
+
+    キャッシュ済みならそれを返し、なければ対話の優先度でその場で取得する。
+    先読み中でもその完了は待たない（低い優先度のまま待たされ、打ち切られたカードも引き継いでしまうため）。
+    先読みが並べた同じ上流リクエストは submit_shared で共有され、対話の優先度に引き上げられる。
+    """
+    key = page_key(query, start_offset)
+    cached = get_cached_page(key)
+    if cached is not None:
+        return cached
+
+    with request_context(INTERACTIVE):
+        results, has_more = fetch_page(query, start_offset)
+    store_results(key, results, has_more)
+    return results, has_more
@@ -0,0 +1,116 @@
+"""
+レート制限
+- トークンバケット方式（スレッドセーフ）
+- SQLiteに状態を置いた、複数プロセスで共有するトークンバケット
+"""
+
+import sqlite3
+import threading
+import time
+
+from shared_state import SHARED_STATE, SharedState
+
+
+class RateLimiter:
+    """
+    トークンバケット方式のレートリミッター
+
+    rate: 1秒あたりに補充されるトークン数
+    burst: バケットの最大容量（連続で即時実行できる回数）
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        トークンを1つ取得を試みる
+
+        Returns:
+            0.0（取得成功）または次のトークンまでの待ち秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def wait_time(self) -> float:
+        """次のトークンまでの待ち秒数（取得はしない。すぐ取得できれば 0.0）"""
+        with self._lock:
+            tokens = min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+        return max(0.0, (1 - tokens) / self.rate)
+
+    def acquire(self, cancel_event: threading.Event = None, max_wait: float = None) -> bool:
+        """
+        トークンを取得できるまで待機
+
+        cancel_event がセットされたら待機を中断して False を返す
+        max_wait 秒以内に取得できない場合も False を返す
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait:
+                    return False
+            if cancel_event is not None:
+                if cancel_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    同一ホストの全プロセスで共有するトークンバケット
+
+    トークン残量と更新時刻をSQLiteに置き、補充と消費を1トランザクションで行う。
+    SQLiteを使えない場合はプロセス内のバケットで代用する。
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1, state: SharedState = SHARED_STATE):
+        super().__init__(rate, burst)
+        self.name = f"rate:{name}"
+        self._state = state
+
+    def try_acquire(self) -> float:
+        try:
+            with self._state.transaction() as conn:
+                now = time.time()
+                row = self._state.read(conn, self.name)
+                tokens, updated = row if row is not None else (float(self.burst), now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+                if tokens >= 1:
+                    self._state.write(conn, self.name, tokens - 1, now)
+                    return 0.0
+                self._state.write(conn, self.name, tokens, now)
+                return (1 - tokens) / self.rate
+        except sqlite3.Error as e:
+            print(f"Shared rate limiter error ({self.name}): {e}")
+            return super().try_acquire()
+
+    def wait_time(self) -> float:
+        try:
+            row = self._state.get(self.name)
+        except sqlite3.Error as e:
+            print(f"Shared rate limiter error ({self.name}): {e}")
+            return super().wait_time()
+        if row is None:
+            return 0.0
+        tokens, updated = row
+        tokens = min(self.burst, tokens + max(0.0, time.time() - updated) * self.rate)
+        return max(0.0, (1 - tokens) / self.rate)
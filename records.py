@@ -0,0 +1,78 @@
+"""
+検索結果のゲームレコード
+- 1件ごとの dict の代わりに __slots__ 付きの dataclass で保持（キー文字列と __dict__ を持たない）
+- 価格・評価・日付・ラベルのように多くのゲームで共通する文字列は sys.intern で1つにまとめる
+- 検索・カタログで作成し、詳細データ取得（enrichment.py）とカード描画（components.py）がそのまま読み書きする
+- セッションの結果をディスクに退避するときは dict（JSON）に変換する（session_store.py）
+"""
+
+import sys
+from dataclasses import asdict, dataclass, replace
+from typing import Optional
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True, eq=False)
+class GameRecord:
+    app_id: int
+    title: str
+    link: str
+    image: Optional[str]
+    price: str
+    price_value: Optional[int]
+    review_count: int
+    review_desc: str
+    date: str
+    attention_label: str = ""
+    is_coming_soon: bool = False
+    # 詳細データ（enrichment.apply_enrichment で設定）
+    is_jp_supported: bool = False
+    description: str = ""
+    video_url: Optional[str] = None
+    screenshots: tuple = ()
+    follower_count: Optional[int] = None
+    has_demo: bool = False
+    # 遅延モード（enrichment.mark_lazy / load_details）
+    lazy_details: bool = False
+    details_loaded: bool = False
+    # 注目度ラベル用のレビュー概要をバックグラウンドで取得中（enrichment.apply_cached_review_summaries）
+    reviews_pending: bool = False
+    # 期限切れ等で詳細データを取得しなかった（検索結果キャッシュに保存しない）
+    enrich_incomplete: bool = False
+
+    def __post_init__(self):
+        self.price = _intern(self.price)
+        self.review_desc = _intern(self.review_desc)
+        self.date = _intern(self.date)
+        self.attention_label = _intern(self.attention_label)
+
+    def copy(self) -> "GameRecord":
+        """浅いコピー（screenshots はタプルなので共有してよい）"""
+        return replace(self)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, fields: dict) -> "GameRecord":
+        return cls(**{**fields, "screenshots": tuple(fields.get("screenshots") or ())})
+
+
+# ゲームごとに異なる文字列（共通の文字列は intern 済みなので数えない）
+_OWN_STRING_FIELDS = ("title", "link", "image", "description", "video_url")
+
+
+def estimate_bytes(games: list) -> int:
+    """結果リストのおおよそのメモリ使用量（バイト）"""
+    total = sys.getsizeof(games)
+    for game in games:
+        total += sys.getsizeof(game) + sys.getsizeof(game.screenshots)
+        total += sum(sys.getsizeof(url) for url in game.screenshots)
+        for name in _OWN_STRING_FIELDS:
+            value = getattr(game, name)
+            if value is not None:
+                total += sys.getsizeof(value)
+    return total
@@ -0,0 +1,70 @@
+"""
+検索結果キャッシュ
+- 正規化したクエリをキーに、詳細データ取得済みの結果を全セッションで共有
+- 短いTTLとサイズ上限付き（cache.TTLCache）
+"""
+
+import config
+from cache import TTLCache
+from search import INDIE_TAG_ID, resolve_tag_ids
+
+SEARCH_RESULT_CACHE = TTLCache(
+    maxsize=config.SEARCH_CACHE_SIZE, ttl=config.SEARCH_CACHE_TTL, name="search_results"
+)
+
+
+def make_query_key(mode: str, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999,
+                   only_japanese=True, start_offset=0, source: str = "search") -> tuple:
+    """
+    検索条件を正規化したキャッシュキーを作成
+
+    タグは解決済みIDの集合として扱うため、選択順やタグ名の違い（同じIDに展開されるもの）は同一視する。
+    Coming Soonはレビュー数で絞り込まないため、レビュー数の範囲はキーに含めない。
+    source: 結果の情報源（"search": Steamの検索 / "catalog": ローカルカタログ）。
+            オフセットの意味が異なる（検索は絞り込み前、カタログは絞り込み後の位置）ため別のキーにする。
+    """
+    target_tag_ids = set(resolve_tag_ids(tags))
+    target_tag_ids.add(INDIE_TAG_ID)  # 検索時に必ず付与されるため
+    if mode == "coming_soon":
+        min_reviews, max_reviews = 0, 9999999
+    return (
+        mode,
+        tuple(sorted(target_tag_ids)),
+        tuple(sorted(set(resolve_tag_ids(exclude_tags_list)))),
+        min_reviews,
+        max_reviews,
+        bool(only_japanese),
+        start_offset,
+        source,
+    )
+
+
+def get_cached_page(query_key: tuple):
+    """
+    キャッシュ済みの (結果, 次のページがあるか) を返す（なければ None）
+
+    呼び出し側が変更しても共有元に影響しないよう結果はコピーする。
+    """
+    entry = SEARCH_RESULT_CACHE.get(query_key)
+    if entry is None:
+        return None
+    results, has_more = entry
+    return [game.copy() for game in results], has_more
+
+
+def get_cached_results(query_key: tuple):
+    """キャッシュ済みの結果を返す（なければ None）"""
+    page = get_cached_page(query_key)
+    return page[0] if page is not None else None
+
+
+def store_results(query_key: tuple, results: list, has_more: bool = True):
+    """
+    詳細データ取得済みの結果を保存
+
+    has_more: 上流にこの次のページがあるか（ページ送りで使う）
+    空の結果は検索エラーの可能性があるため保存しない。
+    取得を打ち切ったカード（enrich_incomplete）を含む結果も、不完全なため保存しない。
+    """
+    if results and not any(game.enrich_incomplete for game in results):
+        SEARCH_RESULT_CACHE.set(query_key, ([game.copy() for game in results], has_more))
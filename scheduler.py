@@ -0,0 +1,241 @@
+"""
+上流リクエストのスケジューラー
+- 上流ホストごとに1つ。ワーカー数 = そのホストへの同時接続上限
+- 優先度（対話 > 先読み > 古代の探索）の高い順に実行し、同じ優先度ではセッションごとに順番に取り出す（公平キュー）
+- 期限切れのジョブと、ブラウザを閉じたセッションのジョブは実行せずに破棄する
+- 同じキーのジョブが待機中・実行中なら新たに並べずにその Future を共有する（ワーカーを重複した待ち合わせで埋めない）。
+  待機中のジョブは、待っている呼び出し元の中で最も高い優先度・最も遅い期限に引き上げる
+- 呼び出し元は request_context で優先度・期限を指定する（contextvars なので投入したジョブを実行するワーカースレッドにも引き継がれる）
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import config
+
+# 優先度（小さいほど先に実行）
+INTERACTIVE = 0  # 表示中の検索結果・カードを開いたときの取得
+PREFETCH = 1     # 次ページの先読み
+SCAN = 2         # 古代モードの深度探索
+
+# 優先度ごとの既定の期限（秒）
+DEFAULT_DEADLINES = {
+    INTERACTIVE: config.INTERACTIVE_DEADLINE,
+    PREFETCH: config.PREFETCH_DEADLINE,
+    SCAN: config.SCAN_DEADLINE,
+}
+
+
+class JobDropped(Exception):
+    """期限切れ、またはセッション終了によりジョブを実行しなかった"""
+
+
+_CONTEXT = contextvars.ContextVar("upstream_request_context", default=None)
+
+
+def current_session_id():
+    """Streamlitのスクリプトスレッドから呼ばれた場合はそのセッションID、それ以外は None"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+def session_is_alive(session_id) -> bool:
+    """セッションがまだ接続中か（Streamlitの外では常に True）"""
+    if session_id is None:
+        return True
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return True
+        return runtime.get_instance().is_active_session(session_id)
+    except Exception:
+        return True
+
+
+@contextmanager
+def request_context(priority: int = INTERACTIVE, deadline_seconds: float = None, session_id=None):
+    """
+    with ブロック内から投入されるジョブの優先度・期限・セッションを指定
+
+    session_id 省略時は現在のStreamlitセッション（スクリプトスレッド以外では None）
+    """
+    if session_id is None:
+        session_id = current_session_id()
+    if deadline_seconds is None:
+        deadline_seconds = DEFAULT_DEADLINES[priority]
+    token = _CONTEXT.set((session_id, priority, time.monotonic() + deadline_seconds))
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
+def current_context() -> tuple:
+    """(session_id, priority, deadline)。request_context の外では対話扱い"""
+    context = _CONTEXT.get()
+    if context is None:
+        return current_session_id(), INTERACTIVE, time.monotonic() + DEFAULT_DEADLINES[INTERACTIVE]
+    return context
+
+
+class _Job:
+    __slots__ = ("future", "func", "args", "key", "priority", "session_id", "sessions", "deadline", "context")
+
+    def __init__(self, future, func, args, key, priority, session_id, deadline, context):
+        self.future = future
+        self.func = func
+        self.args = args
+        self.key = key
+        self.priority = priority
+        self.session_id = session_id  # 並んでいるキューのセッション
+        self.sessions = {session_id}  # 結果を待っているセッション（全員が閉じたら破棄）
+        self.deadline = deadline
+        self.context = context
+
+
+class FairScheduler:
+    """優先度付き・セッション間で公平なワーカープール"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        # 優先度 → {セッションID: そのセッションのジョブ}、取り出す順番のセッションID
+        self._queues = {}
+        self._turns = {}
+        self._by_key = {}  # キー → 待機中・実行中のジョブ
+        self._cond = threading.Condition()
+        self._workers = []
+        self.dropped = 0
+
+    def submit(self, func, *args) -> Future:
+        """現在の request_context の優先度・期限でジョブを投入"""
+        return self._submit(None, func, args)
+
+    def submit_shared(self, func, *args) -> Future:
+        """
+        submit と同じだが、同じ (func, args) のジョブが待機中・実行中ならその Future を返す（args はハッシュ可能なこと）
+
+        待機中のジョブは呼び出し元の優先度が高ければそちらへ移し、期限は遅いほうに延ばす。
+        共有した Future は取り消さないこと（他の呼び出し元も待っている）。
+        """
+        return self._submit((func, args), func, args)
+
+    def _submit(self, key, func, args) -> Future:
+        session_id, priority, deadline = current_context()
+        with self._cond:
+            job = self._by_key.get(key) if key is not None else None
+            if job is not None:
+                self._join(job, session_id, priority, deadline)
+                return job.future
+            # ワーカースレッドでも呼び出し元と同じ request_context で実行する
+            job = _Job(Future(), func, args, key, priority, session_id, deadline, contextvars.copy_context())
+            if key is not None:
+                self._by_key[key] = job
+            self._enqueue(job)
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._run, name=f"{self.name}-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        return job.future
+
+    def _join(self, job, session_id, priority, deadline):
+        """待機中・実行中のジョブに呼び出し元を加える（ロック内で呼ぶ）"""
+        job.sessions.add(session_id)
+        job.deadline = max(job.deadline, deadline)
+        if priority < job.priority and self._remove_queued(job):
+            job.priority = priority
+            job.session_id = session_id
+            self._enqueue(job)
+
+    def _enqueue(self, job):
+        """ジョブの優先度・セッションのキューの末尾に並べる（ロック内で呼ぶ）"""
+        sessions = self._queues.setdefault(job.priority, {})
+        if job.session_id not in sessions:
+            sessions[job.session_id] = deque()
+            self._turns.setdefault(job.priority, deque()).append(job.session_id)
+        sessions[job.session_id].append(job)
+
+    def _remove_queued(self, job) -> bool:
+        """待機中のジョブをキューから外す。実行中・完了済みなら False（ロック内で呼ぶ）"""
+        sessions = self._queues.get(job.priority, {})
+        jobs = sessions.get(job.session_id)
+        if not jobs or job not in jobs:
+            return False
+        jobs.remove(job)
+        if not jobs:
+            del sessions[job.session_id]
+            self._turns[job.priority].remove(job.session_id)
+        return True
+
+    def _next_job(self):
+        """最も優先度の高いキューから、順番が来たセッションのジョブを1つ取り出す（ロック内で呼ぶ）"""
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            turns = self._turns[priority]
+            while turns:
+                session_id = turns.popleft()
+                jobs = sessions[session_id]
+                job = jobs.popleft()
+                if jobs:
+                    turns.append(session_id)  # 残りがあれば列の最後に並び直す
+                else:
+                    del sessions[session_id]
+                return job
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+
+            try:
+                self._execute(job)
+            finally:
+                if job.key is not None:
+                    with self._cond:
+                        if self._by_key.get(job.key) is job:
+                            del self._by_key[job.key]
+
+    def _execute(self, job):
+        if not job.future.set_running_or_notify_cancel():
+            return  # 呼び出し元が取り消し済み
+        with self._cond:
+            deadline, sessions = job.deadline, list(job.sessions)
+        if time.monotonic() > deadline:
+            self.dropped += 1
+            job.future.set_exception(JobDropped(f"{self.name}: deadline exceeded"))
+            return
+        if not any(session_is_alive(session_id) for session_id in sessions):
+            self.dropped += 1
+            job.future.set_exception(JobDropped(f"{self.name}: session closed"))
+            return
+        try:
+            job.future.set_result(job.context.run(job.func, *job.args))
+        except BaseException as e:
+            job.future.set_exception(e)
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(len(jobs) for sessions in self._queues.values() for jobs in sessions.values())
+
+
+STORE_HOST = "store.steampowered.com"
+POPULARITY_HOST = "games-popularity.com"
+
+# ホストごとのスケジューラー（ワーカー数 = そのホストへの同時接続上限。全セッションで共有）
+HOST_SCHEDULERS = {
+    STORE_HOST: FairScheduler("upstream-store", config.STORE_CONCURRENCY),
+    POPULARITY_HOST: FairScheduler("upstream-popularity", config.POPULARITY_CONCURRENCY),
+}
@@ -0,0 +1,271 @@
+"""
+Steamストア検索パイプライン
+- 最新/古代（リリース済み）と未来（Coming Soon）で共通の抽出処理
+- モードごとの違いは SEARCH_MODES の設定で表現
+- 正規表現はモジュール読み込み時に1度だけコンパイル
+"""
+
+import json
+import re
+
+import streamlit as st
+
+import http_client
+from metrics import STAGE_LATENCY
+from records import GameRecord
+from search_parser import parse_search_rows
+from steam_api import calc_attention_label
+from tag_index import TagFilter
+
+SEARCH_URL = "https://store.steampowered.com/search/results/"
+INDIE_TAG_ID = 492  # 全検索で必ず含めるタグ（インディー）
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Cookie": "wants_mature_content=1; birthtime=946652401; lastagecheckage=1-January-2000"
+}
+
+# 検索モード設定
+SEARCH_MODES = {
+    # 最新リリース（古代モードもオフセット違いで利用）
+    "released": {
+        "params": {"sort_by": "Released_DESC"},
+        "with_reviews": True,  # レビュー数の抽出とフィルタを行う
+        "price_default": "不明",
+        "date_default": "",
+        "is_coming_soon": False,
+        "error_label": "検索エラー",
+    },
+    # Coming Soon（近日公開）
+    "coming_soon": {
+        "params": {"filter": "comingsoon", "sort_by": "Released_ASC"},  # リリース予定日昇順
+        "with_reviews": False,
+        "price_default": "価格未定",  # Coming Soonは未定のことが多い
+        "date_default": "Coming Soon",
+        "is_coming_soon": True,
+        "error_label": "Coming Soon検索エラー",
+    },
+}
+
+_APP_ID_RE = re.compile(r'/app/(\d+)')
+
+# レビュー数: 「N 件のユーザーレビュー」「N user reviews」を優先し、次に数字の後に%が来るもの（例: "813件84%"）、
+# なければ最初の数字（いずれもカンマ区切りを含む）
+_REVIEW_COUNT_RE = re.compile(
+    r'^(?:.*?(\d[\d,]*)\s*(?:件のユーザーレビュー|user reviews)'
+    r'|.*?(\d[\d,]*)\D*\d+%'
+    r'|\D*(\d[\d,]*))',
+    re.IGNORECASE | re.DOTALL,
+)
+
+_PRICE_DIGITS_RE = re.compile(r'\d[\d,]*')
+
+
+# ジャンル定義 (JSONから読み込み)
+def load_tags():
+    with open("tags.json", "r", encoding="utf-8") as f:
+        categories = json.load(f)
+    # カテゴリを統合してフラットな辞書に変換
+    tags = {}
+    for category_tags in categories.values():
+        tags.update(category_tags)
+    return tags, categories  # カテゴリ情報も返す
+
+TAGS, TAG_CATEGORIES = load_tags()
+
+
+def resolve_tag_ids(tag_names: list) -> list:
+    """タグ名をタグIDのリストに変換（配列の場合は展開）"""
+    tag_ids = []
+    for t in tag_names:
+        if t in TAGS:
+            tag_value = TAGS[t]
+            if isinstance(tag_value, list):
+                tag_ids.extend(tag_value)
+            else:
+                tag_ids.append(tag_value)
+    return tag_ids
+
+
+def extract_app_id(url: str) -> int:
+    """SteamストアURLからAppIDを抽出"""
+    match = _APP_ID_RE.search(url)
+    return int(match.group(1)) if match else None
+
+
+def parse_review_summary(tooltip: str) -> tuple:
+    """
+    レビューツールチップからレビュー数と評価文字列を取得
+
+    Returns:
+        (review_count, review_desc)
+    """
+    review_count = 0
+    match = _REVIEW_COUNT_RE.match(tooltip)
+    if match:
+        review_count = int(next(group for group in match.groups() if group).replace(",", ""))
+
+    # レビュー概要（1行目）を取得
+    first_line = tooltip.split("<br>", 1)[0]
+    review_desc = first_line if len(first_line) < 50 else "好評"
+    return review_count, review_desc
+
+
+def parse_price_value(price: str):
+    """
+    価格表示を数値（円）に変換
+
+    Returns:
+        int（無料は0）または None（価格未定・不明）
+    """
+    if "Free" in price or "無料" in price:
+        return 0
+    match = _PRICE_DIGITS_RE.search(price)
+    return int(match.group(0).replace(",", "")) if match else None
+
+
+def _normalize_image_url(img_src: str):
+    """カプセル画像URLをヘッダー画像URLに変換"""
+    if not img_src:
+        return img_src
+    return img_src.split("?")[0].replace("capsule_sm_120", "header")
+
+
+def build_search_params(mode: str, target_tag_ids: list, start_offset: int = 0, only_japanese: bool = True) -> dict:
+    """検索APIのクエリパラメータを作成"""
+    search_tag_ids = [str(tid) for tid in target_tag_ids]
+    if str(INDIE_TAG_ID) not in search_tag_ids:
+        search_tag_ids.append(str(INDIE_TAG_ID))
+
+    params = {
+        **SEARCH_MODES[mode]["params"],
+        "tags": ",".join(search_tag_ids),
+        "cc": "JP", "l": "japanese",
+        "category1": 998,
+        "infinite": 1,
+        "start": start_offset,
+        "count": 50,
+    }
+    if only_japanese:
+        params["supportedlang"] = "japanese"
+    return params
+
+
+def extract_games(rows: list, mode: str, target_tag_ids: list, exclude_tag_ids: list,
+                  min_reviews: int = 0, max_reviews: int = 9999999) -> list:
+    """パース済みの検索結果行をモード設定に従ってゲーム情報に変換"""
+    mode_config = SEARCH_MODES[mode]
+    # 除外タグを含まず、ターゲットタグ（指定時）のいずれかを含むもの
+    tag_filter = TagFilter(include_any=target_tag_ids, exclude=exclude_tag_ids)
+
+    games = []
+    for row in rows:
+        game_tag_ids = row["tag_ids"]
+        if game_tag_ids is None or row["title"] is None or not row["link"]:
+            continue
+        if not tag_filter.matches(game_tag_ids):
+            continue
+
+        if mode_config["with_reviews"]:
+            review_count, review_desc = 0, "レビューなし"
+            if row["review_tooltip"] is not None:
+                review_count, review_desc = parse_review_summary(row["review_tooltip"])
+            if review_count < min_reviews or review_count > max_reviews:
+                continue
+        else:
+            review_count, review_desc = 0, "Coming Soon"  # Coming Soonはレビューなし
+
+        price = mode_config["price_default"]
+        if row["final_price"] is not None:
+            price = row["final_price"]
+        elif row["search_price"]:
+            price = "無料プレイ" if "Free" in row["search_price"] or "無料" in row["search_price"] else row["search_price"]
+
+        link = row["link"]
+        games.append(GameRecord(
+            app_id=extract_app_id(link),
+            title=row["title"],
+            link=link,
+            image=_normalize_image_url(row["image"]),
+            price=price,
+            price_value=parse_price_value(price),
+            review_count=review_count,
+            review_desc=review_desc,
+            date=row["released"] or mode_config["date_default"],
+            attention_label="" if mode_config["is_coming_soon"] else calc_attention_label(review_count, review_desc),
+            is_coming_soon=mode_config["is_coming_soon"],
+        ))
+
+    return games
+
+
+class SearchError(Exception):
+    """検索APIの呼び出しに失敗した（メッセージは画面にそのまま表示できる形）"""
+
+
+def fetch_search_page(mode: str, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999, start_offset=0,
+                      only_japanese=True) -> tuple:
+    """
+    検索APIを1ページ分呼び出し、(ゲームリスト, 次のページがあるか) を返す
+
+    次のページの有無は絞り込み前の上流の結果（total_count、なければ行があったか）で判定する。
+    レビュー数やタグの絞り込みで1件も残らないページでも、上流に続きがあれば True になる。
+    画面には何も表示しないため、ワーカースレッド（スケジューラー・古代の並列探索・先読み）から呼んでよい。
+    Raises:
+        SearchError: 通信エラーなどで取得できなかった（表示は呼び出し元のスクリプトスレッドで行う）
+    """
+    target_tag_ids = resolve_tag_ids(tags)
+    exclude_tag_ids = resolve_tag_ids(exclude_tags_list)
+    params = build_search_params(mode, target_tag_ids, start_offset, only_japanese)
+
+    with STAGE_LATENCY.time(stage=f"search.{mode}"):
+        try:
+            res = http_client.get(SEARCH_URL, params=params, headers=HEADERS)
+            if res.status_code >= 400:
+                # エラー応答のJSONを「結果なし」と取り違えない
+                raise RuntimeError(f"HTTP {res.status_code}")
+            try:
+                data = res.json()
+            except ValueError:
+                # APIからの応答が不正な場合は空リストを返す
+                return [], False
+            rows = parse_search_rows(data.get("results_html", ""))
+            games = extract_games(rows, mode, target_tag_ids, exclude_tag_ids, min_reviews, max_reviews)
+            total_count = data.get("total_count")
+            if isinstance(total_count, int):
+                has_more = bool(rows) and start_offset + len(rows) < total_count
+            else:
+                has_more = bool(rows)
+            return games, has_more
+        except Exception as e:
+            raise SearchError(f"{SEARCH_MODES[mode]['error_label']}: {e}") from e
+
+
+def run_search_page(mode: str, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999, start_offset=0,
+                    only_japanese=True) -> tuple:
+    """
+    fetch_search_page のStreamlit向けラッパー（スクリプトスレッドから呼ぶ）
+
+    取得に失敗したらエラーを表示し、空の結果 ([], False) を返す。
+    """
+    try:
+        return fetch_search_page(mode, tags, exclude_tags_list, min_reviews, max_reviews, start_offset, only_japanese)
+    except SearchError as e:
+        st.error(str(e))
+        return [], False
+
+
+def run_search(mode: str, tags, exclude_tags_list, min_reviews=0, max_reviews=9999999, start_offset=0, only_japanese=True):
+    """検索APIを呼び出し、モード設定に従ってゲームリストを返す"""
+    return run_search_page(mode, tags, exclude_tags_list, min_reviews, max_reviews, start_offset, only_japanese)[0]
+
+
+def search_steam_survivor(tags, exclude_tags_list, min_reviews=0, max_reviews=9999999, start_offset=0, only_japanese=True):
+    """Steamストアを検索してゲームリストを取得"""
+    return run_search("released", tags, exclude_tags_list, min_reviews, max_reviews, start_offset, only_japanese)
+
+
+def search_coming_soon(tags, exclude_tags_list, start_offset=0, only_japanese=True):
+    """Coming Soon（近日公開）のゲームを検索"""
+    return run_search("coming_soon", tags, exclude_tags_list, start_offset=start_offset, only_japanese=only_japanese)
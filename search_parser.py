@@ -0,0 +1,95 @@
+"""
+Steam検索結果（results_html）パーサー
+- lxml で1回だけパースし、各 a.search_result_row を1パスで走査
+- セレクタ（XPath）とクラス名の対応表はモジュール読み込み時に1度だけ構築
+"""
+
+import json
+
+from lxml import etree
+
+from metrics import timed
+
+# a.search_result_row をすべて取得
+_ROW_XPATH = etree.XPath(
+    '//a[contains(concat(" ", normalize-space(@class), " "), " search_result_row ")]'
+)
+
+# クラス名 → レコードのフィールド名（各フィールドは行内で最初に出現した要素を採用）
+_CLASS_FIELDS = {
+    "title": "title",
+    "search_review_summary": "review_tooltip",
+    "discount_final_price": "final_price",
+    "search_price": "search_price",
+    "search_released": "released",
+}
+
+_HTML_PARSER = etree.HTMLParser(remove_comments=True)
+
+
+def _parse_tag_ids(tag_str: str):
+    """data-ds-tagids をタグIDのリストに変換（不正な値は None）"""
+    try:
+        return json.loads(tag_str)
+    except ValueError:
+        return None
+
+
+@timed("parse_search_rows")
+def parse_search_rows(results_html: str) -> list:
+    """
+    results_html から検索結果行を抽出
+
+    Returns:
+        [{
+            "link": str,
+            "tag_ids": list or None (data-ds-tagids が不正な場合),
+            "title": str or None,
+            "review_tooltip": str or None (data-tooltip-html),
+            "image": str or None (img の src または data-src),
+            "final_price": str or None (.discount_final_price),
+            "search_price": str or None (.search_price),
+            "released": str or None (.search_released),
+        }, ...]
+    """
+    if not results_html or not results_html.strip():
+        return []
+
+    root = etree.fromstring(results_html, _HTML_PARSER)
+    if root is None:
+        return []
+
+    records = []
+    for row in _ROW_XPATH(root):
+        record = {
+            "link": row.get("href"),
+            "tag_ids": _parse_tag_ids(row.get("data-ds-tagids", "[]")),
+            "title": None,
+            "review_tooltip": None,
+            "image": None,
+            "final_price": None,
+            "search_price": None,
+            "released": None,
+        }
+
+        seen_img = False
+        for el in row.iterdescendants():
+            if el.tag == "img" and not seen_img:
+                seen_img = True
+                record["image"] = el.get("src") or el.get("data-src")
+
+            class_attr = el.get("class")
+            if not class_attr:
+                continue
+            for class_name in class_attr.split():
+                field = _CLASS_FIELDS.get(class_name)
+                if field is None or record[field] is not None:
+                    continue
+                if field == "review_tooltip":
+                    record[field] = el.get("data-tooltip-html", "")
+                else:
+                    record[field] = "".join(el.itertext()).strip()
+
+        records.append(record)
+
+    return records
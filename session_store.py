@@ -0,0 +1,159 @@
+"""
+セッションごとの検索結果ストア
+- 表示中の検索結果を st.session_state ではなくここに置き、全セッション合計のメモリ使用量を上限（バイト数）で抑える
+- 上限を超えたら最も長く参照されていないセッションの結果を永続キャッシュ（SQLite）に退避し、次に参照されたときに読み戻す
+- 接続が切れたセッションの結果は、上限に関係なく定期的に破棄する（退避済みのものはディスクからも削除）
+- 新しい検索などで結果が置き換わったら、退避した古い結果はディスクから削除する
+- 保持量はメトリクス（推定バイト数・セッション数・退避 / 読み戻し / 破棄の件数）で確認できる
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import config
+from cache import CACHE, PersistentCache
+from metrics import SESSION_RESULTS_BYTES, SESSION_RESULTS_EVENTS, SESSION_RESULTS_SESSIONS
+from records import GameRecord, estimate_bytes
+from scheduler import session_is_alive
+
+_NAMESPACE = "session_results"
+_SWEEP_INTERVAL = 30  # 接続が切れたセッションを探す間隔（秒）
+
+
+class SessionResultStore:
+    """
+    budget_bytes: メモリ上に保持する結果の合計（推定バイト数）の上限
+    spill_ttl: 退避した結果の保存期間（秒）
+    """
+
+    def __init__(self, budget_bytes: int, spill_ttl: float, cache: PersistentCache = CACHE):
+        self.budget_bytes = budget_bytes
+        self.spill_ttl = spill_ttl
+        self._cache = cache
+        self._entries = OrderedDict()  # セッションキー → (結果, 推定バイト数)。参照の古い順
+        self._spilling = {}            # 退避の書き込み中の結果（書き込み完了前の参照に返す）
+        self._spilled = set()          # ディスクに退避したセッションキー
+        self._bytes = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> list:
+        """
+        セッションの結果を返す（なければ空リスト）
+
+        退避済みならディスクから読み戻してメモリ上に戻す。返したリストのゲームは
+        カードを開いたときの詳細データ取得でその場で更新されるため、参照のたびに推定サイズを測り直す。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                results = entry[0]
+            else:
+                results = self._spilling.get(key)
+        if results is None:
+            results = self._restore(key)
+            if results is None:
+                return []
+        self.put(key, results)
+        return results
+
+    def put(self, key: str, results: list):
+        """セッションの結果を保存し、上限を超えた分を古いセッションから退避"""
+        size = estimate_bytes(results)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (results, size)
+            self._bytes += size
+            # メモリ上の結果が正になるため、退避した写しは不要
+            stale_rows = [key] if key in self._spilled else []
+            self._spilled.discard(key)
+            stale_rows += self._sweep_closed()
+            victims = self._evict()
+            self._spilling.update(victims)
+            self._spilled.update(victim for victim, _ in victims)
+            self._report()
+        for stale_key in stale_rows:
+            self._cache.delete(_NAMESPACE, stale_key)
+        for victim, victim_results in victims:
+            self._spill(victim, victim_results)
+
+    def discard(self, key: str):
+        """セッションの結果を削除"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+            self._spilled.discard(key)
+            self._report()
+        self._cache.delete(_NAMESPACE, key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sessions": len(self._entries), "bytes": self._bytes, "budget_bytes": self.budget_bytes}
+
+    def _sweep_closed(self) -> list:
+        """
+        接続が切れたセッションの結果をメモリから破棄し、ディスクから削除すべきキーを返す（ロック内で呼ぶ）
+
+        すべてのセッションを調べるため、_SWEEP_INTERVAL 秒に1回だけ行う。
+        """
+        now = time.monotonic()
+        if now - self._last_sweep < _SWEEP_INTERVAL:
+            return []
+        self._last_sweep = now
+        for key in [key for key in self._entries if not session_is_alive(key)]:
+            self._bytes -= self._entries.pop(key)[1]
+            SESSION_RESULTS_EVENTS.inc(event="dropped")
+        closed = [key for key in self._spilled if not session_is_alive(key)]
+        self._spilled.difference_update(closed)
+        if closed:
+            SESSION_RESULTS_EVENTS.inc(len(closed), event="dropped")
+        return closed
+
+    def _evict(self) -> list:
+        """上限を超えた分の (キー, 結果) を参照の古い順に取り出す（ロック内で呼ぶ。直近のセッションは残す）"""
+        victims = []
+        while self._bytes > self.budget_bytes and len(self._entries) > 1:
+            key, (results, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            if session_is_alive(key):
+                victims.append((key, results))
+            else:
+                SESSION_RESULTS_EVENTS.inc(event="dropped")
+        return victims
+
+    def _spill(self, key: str, results: list):
+        try:
+            self._cache.set(_NAMESPACE, key, [game.to_dict() for game in results], self.spill_ttl)
+            SESSION_RESULTS_EVENTS.inc(event="spilled")
+        finally:
+            with self._lock:
+                if self._spilling.get(key) is results:
+                    del self._spilling[key]
+                # 書き込み中にメモリへ戻った・削除された場合は、書き込んだ写しは不要
+                obsolete = key not in self._spilled
+        if obsolete:
+            self._cache.delete(_NAMESPACE, key)
+
+    def _restore(self, key: str):
+        hit, value = self._cache.get(_NAMESPACE, key)
+        if not hit:
+            return None
+        # メモリ上に戻した後はそちらが正（詳細データが追加されるため）。ディスクの写しは消す
+        self._cache.delete(_NAMESPACE, key)
+        with self._lock:
+            self._spilled.discard(key)
+        SESSION_RESULTS_EVENTS.inc(event="restored")
+        return [GameRecord.from_dict(fields) for fields in value]
+
+    def _report(self):
+        SESSION_RESULTS_BYTES.set(self._bytes)
+        SESSION_RESULTS_SESSIONS.set(len(self._entries))
+
+
+# プロセス共通のストア（全セッションで上限を共有）
+SESSION_RESULTS = SessionResultStore(config.SESSION_RESULTS_BUDGET, config.SESSION_RESULTS_SPILL_TTL)
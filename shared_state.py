@@ -0,0 +1,73 @@
+"""
+プロセス間で共有する小さな状態（レートリミッター・サーキットブレーカー用）
+- キャッシュと同じSQLiteファイル（WALモード）に保存
+- 読み取りから更新までを BEGIN IMMEDIATE のトランザクションで行い、複数プロセスから安全に更新する
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    name    TEXT PRIMARY KEY,
+    value_a REAL NOT NULL,
+    value_b REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class SharedState:
+    """名前ごとに2つの数値を持つ共有レコード"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3の接続はスレッド間で共有できないためスレッドごとに持つ
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """書き込みロックを取得したトランザクション（with ブロック内の読み書きは他プロセスと直列化される）"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def get(self, name: str):
+        """トランザクション外での読み取り（(value_a, value_b) または None）"""
+        return self.read(self._connect(), name)
+
+    def read(self, conn: sqlite3.Connection, name: str):
+        """(value_a, value_b) または None"""
+        return conn.execute("SELECT value_a, value_b FROM shared_state WHERE name = ?", (name,)).fetchone()
+
+    def write(self, conn: sqlite3.Connection, name: str, value_a: float, value_b: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO shared_state (name, value_a, value_b) VALUES (?, ?, ?)",
+            (name, value_a, value_b),
+        )
+
+
+# プロセス共通のインスタンス（キャッシュと同じファイルを使う）
+SHARED_STATE = SharedState(config.CACHE_PATH)
@@ -2,11 +2,26 @@
 Steam API 統合モジュール
 - Steam Store API: ゲーム詳細（日本語対応、動画、スクショ）
 - レビュー数ベースの注目度ラベル生成
+- 取得結果は永続キャッシュ（cache.py）経由で全プロセス共有
+- ゲーム詳細・フォロワー数は失効後も一定期間は古い値を返し、バックグラウンドで更新
+- 同一キーの同時呼び出しはシングルフライトで1リクエストに集約
+- レビュー概要はまとめて並行取得し、好評・不評の件数から評価を算出
 """
 
-import requests
+import threading
 import time
-from functools import lru_cache
+from functools import wraps
+
+import config
+import http_client
+from cache import persistent_cache
+from rate_limit import RateLimiter
+from scheduler import HOST_SCHEDULERS, PREFETCH, STORE_HOST, JobDropped, current_context, request_context
+from metrics import timed
+
+# appreviews の取得レート（検索結果1ページ分をまとめて問い合わせるため、プロセス全体で制限する。
+# 待ち時間は RATE_LIMIT_MAX_WAIT まで。超えたら一時的な失敗として扱う）
+REVIEWS_LIMITER = RateLimiter(rate=config.REVIEWS_RATE_PER_SEC, burst=config.REVIEWS_RATE_BURST)
 
 # リクエストヘッダー
 HEADERS = {
@@ -15,7 +30,91 @@ HEADERS = {
 }
 
 
-@lru_cache(maxsize=500)
+class _Call:
+    """実行中の呼び出し（待機中の呼び出し元と結果を共有する）"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    同一キーへの同時呼び出しを1回の実行にまとめる
+
+    先に到着した呼び出し元だけが関数を実行し、同じキーで待っている
+    他の呼び出し元はその結果（または例外）を受け取る。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+_FLIGHT = SingleFlight()
+
+
+def single_flight(namespace: str):
+    """単一引数関数の同時呼び出しを引数ごとに集約するデコレータ"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(key):
+            return _FLIGHT.do((namespace, key), lambda: func(key))
+        return wrapper
+    return decorator
+
+
+# 一時的な失敗（タイムアウト・429・5xx・不正な応答）を表す結果
+_TRANSIENT_FAILURE = {"success": False, "transient": True}
+
+
+def _classify_result(result: dict) -> str:
+    """成功 / 恒久的な欠損（上流が success: false を返した）/ 一時的な失敗 に分類"""
+    if result.get("success"):
+        return "ok"
+    return "error" if result.get("transient") else "miss"
+
+
+def _classify_count(count) -> str:
+    """フォロワー数: 取得失敗は None、未集計は 0"""
+    if count is None:
+        return "error"
+    return "ok" if count > 0 else "miss"
+
+
+_ERROR_AWARE_TTLS = {"negative_ttl": config.NEGATIVE_TTL, "error_ttl": config.TRANSIENT_ERROR_TTL}
+
+
+@timed("steam_api.get_app_details")
+@single_flight("app_details")
+@persistent_cache("app_details", ttl=config.APP_DETAILS_TTL, classify=_classify_result,
+                  max_staleness=config.APP_DETAILS_MAX_STALENESS, **_ERROR_AWARE_TTLS)
 def get_app_details(app_id: int) -> dict:
     """
     Steam Store API からゲーム詳細を取得
@@ -33,15 +132,22 @@ def get_app_details(app_id: int) -> dict:
             "release_date": {"coming_soon": bool, "date": str},
             "recommendations": int (レビュー数)
         }
+        取得できなかった場合は {"success": False}（一時的な失敗なら "transient": True 付き）
     """
     url = f"https://store.steampowered.com/api/appdetails"
     params = {"appids": app_id, "l": "japanese", "cc": "JP"}
     
     try:
-        res = requests.get(url, params=params, headers=HEADERS, timeout=10)
+        res = http_client.get(url, params=params, headers=HEADERS)
+        if res.status_code != 200:
+            print(f"Steam API Error for {app_id}: HTTP {res.status_code}")
+            return dict(_TRANSIENT_FAILURE)
         data = res.json()
+        if data is None:
+            # レート制限中は本文が null になることがある
+            return dict(_TRANSIENT_FAILURE)
         
-        app_data = data.get(str(app_id), {})
+        app_data = data.get(str(app_id)) or {}
         if not app_data.get("success"):
             return {"success": False}
         
@@ -69,9 +175,61 @@ def get_app_details(app_id: int) -> dict:
         }
     except Exception as e:
         print(f"Steam API Error for {app_id}: {e}")
-        return {"success": False}
+        return dict(_TRANSIENT_FAILURE)
+
+
+def _submit_many(fetch, app_ids) -> dict:
+    """
+    ストアのスケジューラーに複数AppIDの取得を並べる（重複AppIDは1回だけ問い合わせる。待たない）
+
+    優先度・期限は呼び出し元の request_context に従う。他の呼び出し元が並べた同じ取得があればその Future を共有する。
+    Returns:
+        {app_id: Future}
+    """
+    scheduler = HOST_SCHEDULERS[STORE_HOST]
+    return {app_id: scheduler.submit_shared(fetch, app_id) for app_id in dict.fromkeys(app_ids) if app_id}
+
+
+def _fetch_many(fetch, app_ids) -> dict:
+    """
+    ストアのスケジューラー経由で複数AppIDを並行取得（重複AppIDは1回だけ問い合わせる）
+
+    期限切れ・セッション終了で実行されなかった分は一時的な失敗として返す。
+    スケジューラーのジョブの中からは呼ばないこと（ワーカーが埋まると待ち合わせになる）。
+    """
+    results = {}
+    for app_id, future in _submit_many(fetch, app_ids).items():
+        try:
+            results[app_id] = future.result()
+        except JobDropped:
+            results[app_id] = dict(_TRANSIENT_FAILURE)
+    return results
+
+
+def submit_app_details_many(app_ids) -> dict:
+    """
+    複数ゲームの詳細の取得をまとめて並べる（待たない。1件ずつ完了を待てるよう Future を返す）
+
+    Returns:
+        {app_id: get_app_details(app_id) の Future}
+    """
+    return _submit_many(get_app_details, app_ids)
 
 
+@timed("steam_api.get_app_details_many")
+def get_app_details_many(app_ids) -> dict:
+    """
+    複数ゲームの詳細をまとめて取得
+
+    Returns:
+        {app_id: get_app_details(app_id) の結果}
+    """
+    return _fetch_many(get_app_details, app_ids)
+
+
+@timed("steam_api.get_app_reviews_summary")
+@single_flight("reviews_summary")
+@persistent_cache("reviews_summary", ttl=config.REVIEWS_SUMMARY_TTL, classify=_classify_result, **_ERROR_AWARE_TTLS)
 def get_app_reviews_summary(app_id: int) -> dict:
     """
     Steam Reviews API からレビュー概要を取得
@@ -84,6 +242,7 @@ def get_app_reviews_summary(app_id: int) -> dict:
             "total_reviews": int,
             "review_score_desc": str (例: "非常に好評", "好評", "賛否両論")
         }
+        取得できなかった場合は {"success": False}（一時的な失敗なら "transient": True 付き）
     """
     url = f"https://store.steampowered.com/appreviews/{app_id}"
     params = {
@@ -94,7 +253,13 @@ def get_app_reviews_summary(app_id: int) -> dict:
     }
     
     try:
-        res = requests.get(url, params=params, headers=HEADERS, timeout=10)
+        # ストアのワーカーを占有し続けないよう、待ち時間はホストのレート制限と同じ上限まで
+        if not REVIEWS_LIMITER.acquire(max_wait=config.RATE_LIMIT_MAX_WAIT):
+            raise http_client.UpstreamUnavailable("store.steampowered.com", REVIEWS_LIMITER.wait_time())
+        res = http_client.get(url, params=params, headers=HEADERS)
+        if res.status_code != 200:
+            print(f"Steam Reviews API Error for {app_id}: HTTP {res.status_code}")
+            return dict(_TRANSIENT_FAILURE)
         data = res.json()
         
         if not data.get("success"):
@@ -115,31 +280,87 @@ def get_app_reviews_summary(app_id: int) -> dict:
         }
     except Exception as e:
         print(f"Steam Reviews API Error for {app_id}: {e}")
-        return {"success": False}
+        return dict(_TRANSIENT_FAILURE)
+
+
+def schedule_app_reviews_summaries(app_ids):
+    """
+    複数ゲームのレビュー概要をバックグラウンドで取得してキャッシュに入れる（完了を待たない）
+
+    先読みと同じ低い優先度でストアのスケジューラーに並べるため、表示中の詳細データ取得を妨げない。
+    結果は get_app_reviews_summary.peek で参照する。
+    """
+    scheduler = HOST_SCHEDULERS[STORE_HOST]
+    session_id = current_context()[0]  # 先読みのスレッドから呼ばれた場合も元のセッションに紐づける
+    with request_context(PREFETCH, session_id=session_id):
+        for app_id in dict.fromkeys(app_id for app_id in app_ids if app_id):
+            scheduler.submit_shared(get_app_reviews_summary, app_id)
 
 
-@lru_cache(maxsize=500)
+@timed("steam_api.get_follower_count")
+@single_flight("follower_count")
+@persistent_cache("follower_count", ttl=config.FOLLOWER_COUNT_TTL, classify=_classify_count,
+                  max_staleness=config.FOLLOWER_COUNT_MAX_STALENESS, **_ERROR_AWARE_TTLS)
 def get_follower_count(app_id: int) -> int:
     """
     Games-Popularity.com API からフォロワー数を取得
     
     Returns:
-        フォロワー数（取得失敗時は0）
+        フォロワー数（未集計のゲームは0、一時的な取得失敗時は None）
     """
     url = f"https://games-popularity.com/swagger/api/game/followers/{app_id}"
     
     try:
-        res = requests.get(url, timeout=10)
-        if res.status_code == 200:
-            data = res.json()
-            # 最新のフォロワー数を取得（historyの最初の要素）
-            followers_list = data.get("history", [])
-            if followers_list and len(followers_list) > 0:
-                return followers_list[0].get("followers", 0)
+        res = http_client.get(url)
+        if res.status_code == 404:
+            return 0
+        if res.status_code != 200:
+            print(f"Games-Popularity API Error for {app_id}: HTTP {res.status_code}")
+            return None
+        data = res.json()
+        # 最新のフォロワー数を取得（historyの最初の要素）
+        followers_list = data.get("history", [])
+        if followers_list and len(followers_list) > 0:
+            return followers_list[0].get("followers", 0)
         return 0
     except Exception as e:
         print(f"Games-Popularity API Error for {app_id}: {e}")
-        return 0
+        return None
+
+
+def calc_review_score_desc(total_positive: int, total_negative: int) -> str:
+    """
+    好評・不評の件数からストアと同じ基準で評価文字列を算出
+
+    基準（好評率 / レビュー数）:
+    - 圧倒的に好評: 95%以上 / 500件以上
+    - 非常に好評: 80%以上 / 50件以上
+    - 好評: 80%以上 / 49件以下
+    - やや好評: 70〜79%
+    - 賛否両論: 40〜69%
+    - やや不評: 20〜39%
+    - 不評: 19%以下 / 49件以下
+    - 非常に不評: 19%以下 / 50件以上
+    - 圧倒的に不評: 19%以下 / 500件以上
+    """
+    total = total_positive + total_negative
+    if total <= 0:
+        return "レビューなし"
+
+    positive_ratio = total_positive / total
+    if positive_ratio >= 0.8:
+        if positive_ratio >= 0.95 and total >= 500:
+            return "圧倒的に好評"
+        return "非常に好評" if total >= 50 else "好評"
+    if positive_ratio >= 0.7:
+        return "やや好評"
+    if positive_ratio >= 0.4:
+        return "賛否両論"
+    if positive_ratio >= 0.2:
+        return "やや不評"
+    if total >= 500:
+        return "圧倒的に不評"
+    return "非常に不評" if total >= 50 else "不評"
 
 
 def calc_attention_label(review_count: int, review_desc: str = "") -> str:
@@ -0,0 +1,78 @@
+"""
+タグクエリエンジン
+- TagIndex: タグID → 該当アプリのインデックス（昇順配列）の転置インデックス
+  カタログ全体に対する include-any / include-all / exclude をNumPyでまとめて評価
+- TagFilter: 検索結果1ページ分の行をタグ集合で判定（ライブ検索用）
+"""
+
+import numpy as np
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+class TagIndex:
+    """CSR形式のタグ列（tag_offsets / tag_ids）から作る転置インデックス"""
+
+    def __init__(self, tag_offsets: np.ndarray, tag_ids: np.ndarray):
+        self.size = len(tag_offsets) - 1
+        owners = np.repeat(np.arange(self.size, dtype=np.int32), np.diff(tag_offsets))
+
+        # タグIDで安定ソートすると、各タグ内のアプリインデックスは昇順のまま並ぶ
+        order = np.argsort(tag_ids, kind="stable")
+        sorted_tags = np.asarray(tag_ids)[order]
+        sorted_owners = owners[order]
+        unique_tags, starts = np.unique(sorted_tags, return_index=True)
+        ends = np.append(starts[1:], len(sorted_tags))
+
+        self._postings = {
+            int(tag): sorted_owners[start:end]
+            for tag, start, end in zip(unique_tags, starts, ends)
+        }
+
+    def postings(self, tag_id: int) -> np.ndarray:
+        """タグを持つアプリのインデックス（昇順）"""
+        return self._postings.get(int(tag_id), _EMPTY)
+
+    def _mask_any(self, tag_ids) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        for tag_id in tag_ids:
+            mask[self.postings(tag_id)] = True
+        return mask
+
+    def query(self, include_any=(), include_all=(), exclude=(), base_mask: np.ndarray = None) -> np.ndarray:
+        """
+        条件に合うアプリのインデックスを昇順で返す
+
+        include_any: いずれかを含む / include_all: すべて含む / exclude: いずれも含まない
+        base_mask: 事前に絞り込んだ真偽値配列（レビュー数・日本語対応など）
+        """
+        mask = np.ones(self.size, dtype=bool) if base_mask is None else base_mask.copy()
+        if include_any:
+            mask &= self._mask_any(include_any)
+        for tag_id in include_all:
+            postings = self.postings(tag_id)
+            if not len(postings):
+                return _EMPTY
+            tag_mask = np.zeros(self.size, dtype=bool)
+            tag_mask[postings] = True
+            mask &= tag_mask
+        if exclude:
+            mask &= ~self._mask_any(exclude)
+        return np.flatnonzero(mask).astype(np.int32)
+
+
+class TagFilter:
+    """検索結果の行（data-ds-tagids）をタグ集合で判定"""
+
+    def __init__(self, include_any=(), include_all=(), exclude=()):
+        self.include_any = frozenset(include_any)
+        self.include_all = frozenset(include_all)
+        self.exclude = frozenset(exclude)
+
+    def matches(self, game_tag_ids) -> bool:
+        tags = frozenset(game_tag_ids)
+        if not self.exclude.isdisjoint(tags):
+            return False
+        if self.include_any and self.include_any.isdisjoint(tags):
+            return False
+        return self.include_all <= tags
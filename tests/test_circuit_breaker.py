@@ -0,0 +1,95 @@
+"""circuit_breaker.CircuitBreaker の half-open（試行1件のみ通す）の確認"""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker
+from shared_state import SharedState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "time", fake.time)
+    return fake
+
+
+@pytest.fixture
+def state(tmp_path):
+    return SharedState(str(tmp_path / "state.db"))
+
+
+def make_breaker(state, name="host"):
+    return CircuitBreaker(name, failure_threshold=2, open_seconds=30, trial_seconds=10, state=state)
+
+
+def open_breaker(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+
+
+def test_opens_after_threshold(state, clock):
+    breaker = make_breaker(state)
+    breaker.record_failure()
+    assert breaker.allow_request() == 0.0
+    breaker.record_failure()
+    assert breaker.retry_after() == pytest.approx(30)
+    assert breaker.allow_request() == pytest.approx(30)
+
+
+def test_half_open_lets_one_trial_through(state, clock):
+    breaker = make_breaker(state)
+    # 別プロセスの想定: 同じ共有レコードを見る別インスタンス
+    other = make_breaker(state)
+    open_breaker(breaker)
+
+    clock.now += 31
+    assert breaker.retry_after() == 0.0
+    assert breaker.allow_request() == 0.0           # 試行のリースを取得
+    assert other.allow_request() == pytest.approx(10)  # 試行中は通さない
+    assert breaker.allow_request() > 0
+
+
+def test_trial_success_closes(state, clock):
+    breaker = make_breaker(state)
+    open_breaker(breaker)
+    clock.now += 31
+    assert breaker.allow_request() == 0.0
+    breaker.record_success()
+    assert breaker.allow_request() == 0.0
+    assert breaker.allow_request() == 0.0
+    # 閉じた後は失敗回数も初期化されている
+    breaker.record_failure()
+    assert breaker.allow_request() == 0.0
+
+
+def test_trial_failure_reopens(state, clock):
+    breaker = make_breaker(state)
+    open_breaker(breaker)
+    clock.now += 31
+    assert breaker.allow_request() == 0.0
+    breaker.record_failure()
+    assert breaker.retry_after() == pytest.approx(30)
+    assert breaker.allow_request() == pytest.approx(30)
+    # 再度の停止時間が過ぎたら次の試行を通す
+    clock.now += 31
+    assert breaker.allow_request() == 0.0
+
+
+def test_expired_trial_lease_is_released(state, clock):
+    breaker = make_breaker(state)
+    open_breaker(breaker)
+    clock.now += 31
+    assert breaker.allow_request() == 0.0
+    # 試行の結果が記録されないまま（プロセス終了など）リース期間が過ぎた
+    clock.now += 11
+    assert breaker.allow_request() == 0.0
+    assert breaker.allow_request() > 0
@@ -0,0 +1,63 @@
+"""scheduler.FairScheduler の同一ジョブの共有（submit_shared）と優先度の引き上げの確認"""
+
+import threading
+
+from scheduler import INTERACTIVE, PREFETCH, SCAN, FairScheduler, request_context
+
+
+def blocked_scheduler():
+    """ワーカー1つのスケジューラーと、そのワーカーを止めておくイベント"""
+    scheduler = FairScheduler("test", max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    scheduler.submit(block)
+    assert started.wait(5)
+    return scheduler, release
+
+
+def test_submit_shared_runs_once():
+    scheduler, release = blocked_scheduler()
+    calls = []
+
+    def fetch(app_id):
+        calls.append(app_id)
+        return app_id * 2
+
+    first = scheduler.submit_shared(fetch, 10)
+    second = scheduler.submit_shared(fetch, 10)
+    other = scheduler.submit_shared(fetch, 11)
+    assert first is second
+    assert scheduler.pending() == 2
+    release.set()
+    assert first.result(5) == 20
+    assert other.result(5) == 22
+    assert calls == [10, 11]
+
+    # 完了後は新たに実行する
+    assert scheduler.submit_shared(fetch, 10).result(5) == 20
+    assert calls == [10, 11, 10]
+
+
+def test_shared_job_is_promoted_to_waiting_priority():
+    scheduler, release = blocked_scheduler()
+    order = []
+
+    with request_context(PREFETCH, session_id="a"):
+        prefetched = scheduler.submit_shared(order.append, "prefetch")
+    with request_context(SCAN, session_id="b"):
+        scheduler.submit(order.append, "scan")
+    with request_context(INTERACTIVE, session_id="c"):
+        scheduler.submit(order.append, "interactive")
+        # 先読みのジョブを対話の呼び出し元が待つと、対話の優先度に引き上げる（対話の列の後ろに並ぶ）
+        assert scheduler.submit_shared(order.append, "prefetch") is prefetched
+
+    release.set()
+    prefetched.result(5)
+    with request_context(SCAN, session_id="b"):
+        scheduler.submit(order.append, "done").result(5)
+    assert order == ["interactive", "prefetch", "scan", "done"]
@@ -0,0 +1,75 @@
+"""
+古代（ランダム探索）モードの並列スキャン
+- 複数のオフセットページをレート制限下で同時に取得
+- 到着順にマージし、必要件数に達したら残りの取得を打ち切る
+"""
+
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from rate_limit import RateLimiter
+
+# 検索ページ取得用のレートリミッター（全セッション共通）
+SEARCH_LIMITER = RateLimiter(rate=config.SEARCH_RATE_PER_SEC, burst=config.SEARCH_RATE_BURST)
+
+
+def random_offsets(count: int, max_page: int = 100, page_size: int = 50) -> list:
+    """重複しないランダムなオフセットを count 個生成"""
+    pages = random.sample(range(max_page + 1), min(count, max_page + 1))
+    return [page * page_size for page in pages]
+
+
+def scan_offsets(fetch_page, offsets: list, min_results: int, max_workers: int = None,
+                 limiter: RateLimiter = SEARCH_LIMITER, on_update=None, on_error=None) -> list:
+    """
+    オフセットページを並列取得して min_results 件集まるまでマージ
+
+    fetch_page: オフセットを受け取りゲームリストを返す関数（ワーカースレッドで実行される）
+    on_update: ページ到着ごとに (オフセット, 累計件数) で呼ばれるコールバック
+               （呼び出し元スレッドで実行される）
+    on_error: fetch_page が例外を送出するたびに (オフセット, 例外) で呼ばれるコールバック
+              （呼び出し元スレッドで実行される。省略時はログに出力して探索を続ける）
+    Returns:
+        app_id で重複排除したゲームリスト（到着順）
+    """
+    stop = threading.Event()
+
+    def fetch(offset):
+        if stop.is_set() or (limiter and not limiter.acquire(stop)):
+            return offset, [], None
+        try:
+            return offset, fetch_page(offset), None
+        except Exception as e:
+            # ワーカースレッドでは画面に表示できないため、呼び出し元スレッドへ渡す
+            return offset, [], e
+
+    all_results = []
+    seen_ids = set()
+    executor = ThreadPoolExecutor(max_workers=max_workers or config.TREASURE_SCAN_CONCURRENCY)
+    try:
+        futures = [executor.submit(fetch, offset) for offset in offsets]
+        for future in as_completed(futures):
+            offset, found_games, error = future.result()
+            if error is not None:
+                if on_error:
+                    on_error(offset, error)
+                else:
+                    print(f"Treasure scan error (offset={offset}): {error}")
+            for game in found_games:
+                if game.app_id not in seen_ids:
+                    seen_ids.add(game.app_id)
+                    all_results.append(game)
+
+            if on_update:
+                on_update(offset, len(all_results))
+
+            if len(all_results) >= min_results:
+                break
+    finally:
+        # 未着手のページは取り消し、待機中のワーカーも止める
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return all_results
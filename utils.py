@@ -1,15 +1,15 @@
 import base64
-import os
+
+from assets import REGISTRY
 
 def get_base64_image(image_path):
     with open(image_path, "rb") as f:
         return base64.b64encode(f.read()).decode()
 
 def get_icon_html(icon_name, width=24):
-    """アイコン画像をHTMLタグとして取得"""
-    path = f"img/{icon_name}.png"
-    if os.path.exists(path):
-        b64 = get_base64_image(path)
-        return f'<img src="data:image/png;base64,{b64}" width="{width}" style="vertical-align: -4px; margin-right: 5px;">'
+    """アイコン画像をHTMLタグとして取得（表示サイズに縮小済みのものを再利用）"""
+    data_uri = REGISTRY.icon_data_uri(icon_name, width)
+    if data_uri:
+        return f'<img src="{data_uri}" width="{width}" style="vertical-align: -4px; margin-right: 5px;">'
     return ""
 